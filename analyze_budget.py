@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Report page weight per screen and enforce byte budgets.
+
+Statically parses ``index.html`` (``img``/``script``/``link`` references and
+inline ``url()``s), ``style.css`` (``url()``s, attributed to a screen when the
+selector names one) and ``main.js`` (the templated sprite paths in
+``CREATURES``, the ``BIOMES`` creature pools and backgrounds, ``setBackground``
+calls, the overworld ``.dzi`` and the ``fetch()`` calls made at startup), then
+resolves each reference the way the game does for a given viewport:
+
+* backgrounds go through ``assets/backgrounds/manifest.json`` to the WebP
+  ladder variant ``pickBackgroundVariant`` would choose;
+* sprites come from the atlas pages when ``atlas.json`` exists, otherwise from
+  the individual PNGs;
+* the overworld costs its overview tile plus the tiles visible when the map
+  first covers the viewport.
+
+Every screen (ranch, overworld, each biome, encounter and the codex) is charged
+the bytes it loads beyond the startup ``shell`` (an encounter also beyond its
+biome screen). A biome shows its day or its night background, never both, so
+the pre-rendered night background is reported on its own ``biome:<key>:night``
+row under the same budget; ``first-paint`` is the shell plus the ranch screen. Sizes are
+reported raw, gzip and – when the optional ``brotli`` module is installed –
+brotli. Assets fetched eagerly at startup but not needed for the first paint
+are flagged.
+
+Budgets (bytes of ``--metric``, gzip by default) are checked per row; biome
+and encounter budgets apply to every biome. The script exits with status 1
+when any budget is exceeded.
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import sys
+from functools import lru_cache
+
+from build_store import BASE_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_BUDGETS = {
+    'first-paint': 400 * 1024,
+    'shell': 250 * 1024,
+    'ranch': 300 * 1024,
+    'overworld': 300 * 1024,
+    'biome': 400 * 1024,
+    'encounter': 100 * 1024,
+    'codex': 100 * 1024,
+}
+SCREENS = ('ranch', 'overworld', 'biome', 'encounter', 'codex')
+FIRST_PAINT_SCREEN = 'ranch'
+BACKGROUND_DIR = "assets/backgrounds/"
+
+
+@lru_cache(maxsize=None)
+def sizes(path):
+    """Return ``(raw, gzip, brotli_or_None)`` byte counts of a repo file."""
+    with open(os.path.join(BASE_DIR, path), "rb") as fh:
+        data = fh.read()
+    return (len(data), len(gzip.compress(data, 9, mtime=0)),
+            len(brotli.compress(data, quality=11)) if brotli else None)
+
+
+def read_text(path):
+    with open(os.path.join(BASE_DIR, path), "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+def parse_html(html):
+    """Return the local URLs an HTML document references directly."""
+    refs = re.findall(r'\b(?:src|href)="([^"#:]+)"', html)
+    refs += re.findall(r"url\(['\"]?([^'\")]+)['\"]?\)", html)
+    return [ref for ref in refs if not ref.startswith("data:")]
+
+
+def parse_css(css):
+    """Return ``(screen_or_None, url)`` for every ``url()`` in a stylesheet."""
+    refs = []
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    for selector, body in re.findall(r"([^{}]+)\{([^}]*)\}", css):
+        screen = next((s for s in SCREENS if f"#{s}-screen" in selector), None)
+        for url in re.findall(r"url\(['\"]?([^'\")]+)['\"]?\)", body):
+            if not url.startswith("data:"):
+                refs.append((screen, url))
+    return refs
+
+
+def parse_main_js(source):
+    """Extract the asset references main.js builds from its data tables."""
+    constants = dict(re.findall(r"^  const (\w+) = '([^']*)';", source, re.MULTILINE))
+    start = source.index("const creatureList = [")
+    ids = re.findall(r"'(\w+)'", source[start:source.index("];", start)])
+    templates = dict(re.findall(r"(\w+)Img: assetUrl\(`([^`]+)`\)", source))
+
+    def resolve(expr):
+        parts = [p.strip() for p in expr.split("+")]
+        return "".join(constants.get(p, p.strip("'")) for p in parts)
+
+    # fetch() calls at the top level of the IIFE run at startup
+    eager = [resolve(expr) for expr in
+             re.findall(r"^  const \w+ = fetch\(assetUrl\(([^)]+)\)\)", source, re.MULTILINE)]
+
+    body = source[source.index("const BIOMES = {"):]
+    body = body[:body.index("\n  };")]
+    biomes = {}
+    for key, block in re.findall(r"^    (\w+): \{(.*?)^    \}", body, re.MULTILINE | re.DOTALL):
+        pools = {phase: ids[int(a):int(b)] for phase, a, b in
+                 re.findall(r"(day|night): creatureList\.slice\((\d+), (\d+)\)", block)}
+        background = re.search(r"background: '([^']+)'", block).group(1)
+        biomes[key] = dict(pools, background=background)
+
+    elements = dict(re.findall(r"const (\w+) = document\.getElementById\('([\w-]+)'\)", source))
+    backgrounds = {}
+    for var, file in re.findall(r"setBackground\((\w+), '([^']+)'\)", source):
+        screen = elements.get(var, "").replace("-screen", "")
+        backgrounds[screen] = file
+    return {
+        'ids': ids,
+        'templates': templates,
+        'eager': eager,
+        'biomes': biomes,
+        'backgrounds': backgrounds,
+        'map': constants.get('MAP_DZI'),
+    }
+
+
+def background_variant(file, manifest, viewport, dpr):
+    """Return the file ``pickBackgroundVariant`` would load for a background."""
+    entry = manifest.get(file)
+    if not entry:
+        return BACKGROUND_DIR + file
+    width, height = viewport
+    needed = max(width, height * entry['width'] / entry['height']) * dpr
+    variant = next((v for v in entry['variants'] if v['width'] >= needed), entry['variants'][-1])
+    return BACKGROUND_DIR + variant['webp']
+
+
+def map_tiles(dzi_path, viewport, dpr):
+    """Return the overview and visible tile paths of the map at its cover fit."""
+    attrs = dict(re.findall(r'(\w+)="([^"]*)"', read_text(dzi_path)))
+    width, height = int(attrs["Width"]), int(attrs["Height"])
+    tile_size = int(attrs["TileSize"])
+    max_level = math.ceil(math.log2(max(width, height)))
+    overview = max_level - max(0, math.ceil(math.log2(max(width, height) / tile_size)))
+    scale = max(viewport[0] / width, viewport[1] / height)
+    level = max(overview, min(max_level, max_level - math.floor(math.log2(1 / (scale * dpr)))))
+    span = tile_size * 2 ** (max_level - level)
+    # Centred crop, like fitMap()
+    left = (width - viewport[0] / scale) / 2
+    top = (height - viewport[1] / scale) / 2
+    right, bottom = width - left, height - top
+    tile_dir = dzi_path[:-len(".dzi")] + "_files/"
+    fmt = attrs["Format"]
+    tiles = [f"{tile_dir}{overview}/0_0.{fmt}"]
+    for col in range(max(0, math.floor(left / span)), min(math.ceil(width / span), math.ceil(right / span))):
+        for row in range(max(0, math.floor(top / span)), min(math.ceil(height / span), math.ceil(bottom / span))):
+            tiles.append(f"{tile_dir}{level}/{col}_{row}.{fmt}")
+    return list(dict.fromkeys(tiles))
+
+
+def screen_assets(viewport=(1280, 720), dpr=1):
+    """Return ``(rows, flagged)``: asset paths per report row, and the eagerly
+    loaded assets the first paint does not need."""
+    html = read_text("index.html")
+    js = parse_main_js(read_text("main.js"))
+    manifest_path = BACKGROUND_DIR + "manifest.json"
+    manifest = json.loads(read_text(manifest_path)) if os.path.exists(
+        os.path.join(BASE_DIR, manifest_path)) else {}
+    atlas_path = "assets/creatures/atlas.json"
+    atlas_pages = []
+    if atlas_path in js['eager'] and os.path.exists(os.path.join(BASE_DIR, atlas_path)):
+        atlas_pages = ["assets/creatures/" + p for p in json.loads(read_text(atlas_path))['pages']]
+
+    def sprites(kinds, ids):
+        if atlas_pages:
+            return list(atlas_pages)
+        return [js['templates'][kind].replace("${id}", cid) for kind in kinds for cid in ids]
+
+    def background(file):
+        return background_variant(file, manifest, viewport, dpr)
+
+    html_refs = parse_html(html)
+    css_refs = []
+    for ref in html_refs:
+        if ref.endswith(".css"):
+            css_refs += parse_css(read_text(ref))
+    eager = ["index.html"] + html_refs + [url for _, url in css_refs] + js['eager'] + atlas_pages
+    eager = [p for p in dict.fromkeys(eager) if os.path.exists(os.path.join(BASE_DIR, p))]
+
+    rows = {'shell': eager}
+    rows['ranch'] = [background(js['backgrounds']['ranch'])] if 'ranch' in js['backgrounds'] else []
+    rows['overworld'] = map_tiles(js['map'], viewport, dpr) if js['map'] else []
+    for key, biome in js['biomes'].items():
+        day = biome['background']
+        night = day.replace("_day.", "_night.")
+        # Only one phase's background is loaded at a time, so night gets its own row
+        rows[f'biome:{key}'] = [background(day)]
+        if night in manifest:
+            rows[f'biome:{key}:night'] = [background(night)]
+        pool = biome.get('day', []) + biome.get('night', [])
+        # Encounters are only reached from the biome screen, which loaded its backgrounds
+        rows[f'encounter:{key}'] = [p for p in [background(day)] + sprites(('base', 'radiant', 'unique'), pool)
+                                    if p not in rows[f'biome:{key}']]
+    rows['codex'] = sprites(('silhouette',), js['ids'])
+    for screen, url in css_refs:
+        rows.setdefault(screen or 'shell', []).append(url)
+    rows = {name: [p for p in dict.fromkeys(paths) if name == 'shell' or p not in eager]
+            for name, paths in rows.items()}
+
+    # Needed for the first paint: the page itself, its stylesheet and script,
+    # the background manifest the ranch background is resolved through, and
+    # the ranch screen's own assets
+    needed = {"index.html", manifest_path} | {p for p in html_refs if p.endswith((".css", ".js"))}
+    needed |= set(rows[FIRST_PAINT_SCREEN])
+    rows['first-paint'] = [p for p in eager if p in needed] + rows[FIRST_PAINT_SCREEN]
+    return rows, [p for p in eager if p not in needed]
+
+
+def totals(paths):
+    raw = [sizes(p) for p in paths if os.path.exists(os.path.join(BASE_DIR, p))]
+    br = None if brotli is None else sum(s[2] for s in raw)
+    return {'files': len(raw), 'raw': sum(s[0] for s in raw), 'gzip': sum(s[1] for s in raw), 'brotli': br}
+
+
+def check_budgets(viewport=(1280, 720), dpr=1, budgets=DEFAULT_BUDGETS, metric='gzip', as_json=False):
+    """Print the per-screen report; return the list of exceeded budgets."""
+    rows, flagged = screen_assets(viewport, dpr)
+    report = {name: totals(paths) for name, paths in rows.items()}
+    failures = []
+    for name, total in report.items():
+        limit = budgets.get(name, budgets.get(name.split(":")[0]))
+        total['budget'] = limit
+        if limit is not None and (total[metric] or 0) > limit:
+            failures.append(name)
+
+    if as_json:
+        json.dump({'viewport': list(viewport), 'dpr': dpr, 'metric': metric, 'screens': report,
+                   'eagerNotFirstPaint': flagged, 'exceeded': failures}, sys.stdout, indent=1)
+        print()
+        return failures
+
+    print(f"Viewport {viewport[0]}x{viewport[1]} @{dpr}x, budgets on {metric} bytes"
+          + ("" if brotli else " (brotli not installed)"))
+    print(f"{'screen':<20} {'files':>5} {'raw':>10} {'gzip':>10} {'brotli':>10} {'budget':>10}")
+    for name, t in report.items():
+        status = "" if t['budget'] is None else ("  OVER" if name in failures else "  ok")
+        print(f"{name:<20} {t['files']:>5} {t['raw']:>10} {t['gzip']:>10} "
+              f"{t['brotli'] if t['brotli'] is not None else '-':>10} "
+              f"{t['budget'] if t['budget'] is not None else '-':>10}{status}")
+    if flagged:
+        print("\nLoaded eagerly but not needed for first paint:")
+        for path in flagged:
+            print(f"  {path} ({sizes(path)[0]} bytes)")
+    if failures:
+        print(f"\nBudget exceeded: {', '.join(failures)}")
+    return failures
+
+
+def parse_viewport(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_budget(value):
+    name, limit = value.split("=")
+    return name, int(limit)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Per-screen page weight and budget check.")
+    parser.add_argument('--viewport', type=parse_viewport, default=(1280, 720),
+                        help="CSS pixel viewport, WIDTHxHEIGHT (default 1280x720)")
+    parser.add_argument('--dpr', type=float, default=1, help="device pixel ratio")
+    parser.add_argument('--metric', choices=('raw', 'gzip', 'brotli'), default='gzip')
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                        metavar='SCREEN=BYTES', help="override a budget (repeatable)")
+    parser.add_argument('--budget-file', help="JSON object of screen -> byte budget")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+    if args.metric == 'brotli' and brotli is None:
+        parser.error("--metric brotli needs the brotli module")
+    budgets = dict(DEFAULT_BUDGETS)
+    if args.budget_file:
+        with open(args.budget_file, "r", encoding="utf-8") as fh:
+            budgets.update(json.load(fh))
+    budgets.update(dict(args.budget))
+    sys.exit(1 if check_budgets(args.viewport, args.dpr, budgets, args.metric, args.json) else 0)
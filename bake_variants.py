@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Bake the radiant and silhouette sprite variants ahead of time.
+
+The game used to derive these at runtime with CSS filters on every sprite:
+
+``radiant``     – ``hue-rotate(160deg) saturate(1.5) brightness(1.2)``
+``silhouette``  – ``grayscale(100%) brightness(0.3)`` (uncaught codex entries)
+
+This module applies the exact colour matrices the Filter Effects spec defines
+for those functions to the base sprites in a single NumPy batch and writes the
+results next to the other creature folders:
+
+``assets/creatures/radiant``     – ``<name>_radiant.png``
+``assets/creatures/silhouette``  – ``<name>_silhouette.png``
+
+Filter functions are evaluated in sRGB like browsers do for the CSS shorthand,
+with the result clamped to [0, 1] after each function.
+
+``generate_creatures.generate_all`` bakes the variants of every sprite it
+renders, so they follow the base art; run this script directly to rebake all
+of them, e.g. after changing a filter chain.
+"""
+
+import glob
+import math
+import os
+import numpy as np
+from PIL import Image
+
+from generate_creatures import ASSETS_DIR, PNG_ENCODER, encode_sprite_png, write_if_changed
+
+RADIANT_OUTPUT = os.path.join(ASSETS_DIR, "radiant")
+SILHOUETTE_OUTPUT = os.path.join(ASSETS_DIR, "silhouette")
+# Variant folders under the creature assets, in the order of their filter chains
+VARIANTS = ('radiant', 'silhouette')
+
+
+def hue_rotate(degrees):
+    a = math.radians(degrees)
+    c, s = math.cos(a), math.sin(a)
+    return np.array([
+        [0.213 + c * 0.787 - s * 0.213, 0.715 - c * 0.715 - s * 0.715, 0.072 - c * 0.072 + s * 0.928],
+        [0.213 - c * 0.213 + s * 0.143, 0.715 + c * 0.285 + s * 0.140, 0.072 - c * 0.072 - s * 0.283],
+        [0.213 - c * 0.213 - s * 0.787, 0.715 - c * 0.715 + s * 0.715, 0.072 + c * 0.928 + s * 0.072],
+    ])
+
+
+def saturate(amount):
+    s = amount
+    return np.array([
+        [0.213 + 0.787 * s, 0.715 - 0.715 * s, 0.072 - 0.072 * s],
+        [0.213 - 0.213 * s, 0.715 + 0.285 * s, 0.072 - 0.072 * s],
+        [0.213 - 0.213 * s, 0.715 - 0.715 * s, 0.072 + 0.928 * s],
+    ])
+
+
+def grayscale(amount):
+    g = 1.0 - min(1.0, amount)
+    return np.array([
+        [0.2126 + 0.7874 * g, 0.7152 - 0.7152 * g, 0.0722 - 0.0722 * g],
+        [0.2126 - 0.2126 * g, 0.7152 + 0.2848 * g, 0.0722 - 0.0722 * g],
+        [0.2126 - 0.2126 * g, 0.7152 - 0.7152 * g, 0.0722 + 0.9278 * g],
+    ])
+
+
+def brightness(amount):
+    return np.eye(3) * amount
+
+
+# CSS filter chains as sequences of 3x3 colour matrices, applied left to right
+RADIANT_FILTER = (hue_rotate(160), saturate(1.5), brightness(1.2))
+SILHOUETTE_FILTER = (grayscale(1.0), brightness(0.3))
+
+
+def apply_filter_chain(batch, chain):
+    """Apply a chain of colour matrices to an ``[N, H, W, 4]`` uint8 RGBA batch.
+
+    Alpha is passed through untouched; colour is clamped after every step, as
+    each CSS filter function is a separate primitive.
+    """
+    rgb = batch[..., :3].astype(np.float64) / 255.0
+    for matrix in chain:
+        rgb = np.clip(rgb @ matrix.T, 0.0, 1.0)
+    out = batch.copy()
+    out[..., :3] = np.rint(rgb * 255.0).astype(np.uint8)
+    return out
+
+
+def variant_paths(name, assets_dir=ASSETS_DIR):
+    """Return the ``(radiant_path, silhouette_path)`` output files for a creature."""
+    return tuple(os.path.join(assets_dir, variant, f"{name}_{variant}.png") for variant in VARIANTS)
+
+
+def bake_variants(names=None, assets_dir=ASSETS_DIR, png_encoder=PNG_ENCODER, verbose=True):
+    """Write radiant and silhouette variants of the base sprites.
+
+    ``names`` limits the bake to those creatures; by default every base sprite
+    under ``assets_dir`` is baked. Files are only rewritten when their bytes
+    differ.
+    """
+    base_dir = os.path.join(assets_dir, "base")
+    if names is None:
+        paths = sorted(glob.glob(os.path.join(base_dir, "*_base.png")))
+        names = [os.path.basename(p)[:-len("_base.png")] for p in paths]
+    else:
+        paths = [os.path.join(base_dir, f"{name}_base.png") for name in names]
+    if not names:
+        return
+    for variant in VARIANTS:
+        os.makedirs(os.path.join(assets_dir, variant), exist_ok=True)
+    batch = np.stack([np.asarray(Image.open(p).convert("RGBA")) for p in paths])
+    for v, (variant, chain) in enumerate(zip(VARIANTS, (RADIANT_FILTER, SILHOUETTE_FILTER))):
+        baked = apply_filter_chain(batch, chain)
+        written = 0
+        for name, pixels in zip(names, baked):
+            written += write_if_changed(variant_paths(name, assets_dir)[v],
+                                        encode_sprite_png(Image.fromarray(pixels), png_encoder))
+        if verbose:
+            print(f"Baked {len(names)} {variant} sprites ({written} changed)")
+
+
+if __name__ == '__main__':
+    bake_variants()
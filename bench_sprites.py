@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the sprite pipeline.
+
+Two groups of measurements, written to a JSON results file:
+
+``micro``  – one case per feature branch of ``draw_creature`` (each tail kind,
+             horns, spines, crest, spots, fins, and everything at once) on
+             top of a plain creature. Each case times compiling the display
+             list (with the compile cache cleared) and replaying it with
+             Pillow; the fastest of ``--repeat`` rounds is kept.
+``e2e``    – ``generate_all`` over 50, 1k and 10k synthetic creatures (sampled
+             by ``batch_render.synthetic_params`` with a fixed seed) into a
+             scratch folder. Each size runs in a fresh interpreter so that
+             wall time, peak RSS and bytes written are not skewed by earlier
+             cases. Peak RSS is the larger of the case process and its
+             largest pool worker, not their sum.
+
+``--baseline FILE`` compares the run against an earlier results file and
+exits with status 1 when any time, memory or size metric grew by more than
+``--tolerance``; ``--save-baseline FILE`` stores the run as the new baseline.
+The baseline is read before anything is written, and may not be the
+``--output`` file, which every run overwrites.
+Timings are only comparable on the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from creature_catalogue import clear_compile_cache, compile_creature
+from generate_creatures import PNG_ENCODER, generate_all, replay_pillow
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PLAIN = {'color': (120, 160, 90), 'tail': 'normal', 'horns': False, 'spines': 0,
+         'crest': False, 'spots': False, 'fins': False}
+MICRO_CASES = {
+    'plain': {},
+    'tail_long': {'tail': 'long'},
+    'tail_leaf': {'tail': 'leaf'},
+    'tail_fin': {'tail': 'fin'},
+    'horns': {'horns': True},
+    'spines': {'spines': 4},
+    'crest': {'crest': True},
+    'spots': {'spots': True},
+    'fins': {'fins': True},
+    'all': {'tail': 'leaf', 'horns': True, 'spines': 4, 'crest': True, 'spots': True, 'fins': True},
+}
+E2E_SIZES = (50, 1000, 10000)
+SYNTHETIC_SEED = 2024
+DEFAULT_TOLERANCE = 0.10
+
+
+def _best_per_call(func, number, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - started) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_micro(number=200, repeat=5):
+    """Time display list compilation and Pillow replay for every feature case."""
+    results = {}
+    for case, overrides in MICRO_CASES.items():
+        params = dict(PLAIN, **overrides)
+
+        def compile_uncached():
+            clear_compile_cache()
+            return compile_creature(params, seed=case)
+
+        ops = compile_uncached()
+        compile_s = _best_per_call(compile_uncached, number, repeat)
+        replay_s = _best_per_call(lambda: replay_pillow(ops), number, repeat)
+        results[case] = {'ops': len(ops), 'compile_us': compile_s * 1e6,
+                         'replay_us': replay_s * 1e6, 'draw_us': (compile_s + replay_s) * 1e6}
+    clear_compile_cache()
+    return results
+
+
+def folder_bytes(root):
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        total += sum(os.path.getsize(os.path.join(dirpath, name)) for name in files)
+    return total
+
+
+def run_e2e_case(count, jobs, encoder, out_path):
+    """Run one ``generate_all`` size in this process and write its metrics."""
+    from batch_render import synthetic_params
+    creatures = [(f"synthetic_{i:05d}", params)
+                 for i, params in enumerate(synthetic_params(count, SYNTHETIC_SEED))]
+    scratch = tempfile.mkdtemp(prefix="bench_sprites_")
+    try:
+        started = time.perf_counter()
+        generate_all(jobs=jobs, png_encoder=encoder, creatures=creatures,
+                     assets_dir=scratch, verbose=False)
+        wall = time.perf_counter() - started
+        written = folder_bytes(scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    # ru_maxrss is in kilobytes on Linux; for RUSAGE_CHILDREN it is the
+    # largest single worker, so this is a high-water mark, not a total
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    with open(out_path, "w", encoding="utf-8") as fh:
+        json.dump({'creatures': count, 'sprites': count * 2, 'wall_s': wall,
+                   'sprites_per_s': count * 2 / wall, 'peak_rss_kb': peak,
+                   'bytes_written': written}, fh)
+
+
+def run_e2e(sizes=E2E_SIZES, jobs=1, encoder=PNG_ENCODER):
+    results = {}
+    for count in sizes:
+        fd, out_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--e2e-case', str(count),
+                            '--jobs', str(jobs), '--png-encoder', encoder, '--case-output', out_path],
+                           cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+            with open(out_path, "r", encoding="utf-8") as fh:
+                results[str(count)] = json.load(fh)
+        finally:
+            os.remove(out_path)
+        r = results[str(count)]
+        print(f"e2e {count:>6} creatures: {r['wall_s']:8.2f}s {r['sprites_per_s']:8.1f} sprites/s "
+              f"peak {r['peak_rss_kb'] / 1024:7.1f} MB, {r['bytes_written']} bytes")
+    return results
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return ``(metric, baseline, current, ratio)`` for every regression."""
+    regressions = []
+    checks = [('micro', case, metric) for case in current.get('micro', {})
+              for metric in ('compile_us', 'replay_us')]
+    checks += [('e2e', size, metric) for size in current.get('e2e', {})
+               for metric in ('wall_s', 'peak_rss_kb', 'bytes_written')]
+    for group, case, metric in checks:
+        old = baseline.get(group, {}).get(case, {}).get(metric)
+        new = current[group][case][metric]
+        if not old:
+            continue
+        ratio = new / old
+        flag = ratio > 1 + tolerance
+        print(f"{group:<6} {case:<10} {metric:<14} {old:>14.2f} {new:>14.2f} {ratio:>7.2f}x"
+              + ("  REGRESSION" if flag else ""))
+        if flag:
+            regressions.append((f"{group}.{case}.{metric}", old, new, ratio))
+    return regressions
+
+
+def environment():
+    try:
+        from PIL import __version__ as pillow
+    except ImportError:
+        pillow = None
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'pillow': pillow,
+            'date': time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark draw_creature and generate_all.")
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(E2E_SIZES),
+                        help="synthetic creature counts for the end-to-end runs")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help="generate_all worker processes")
+    parser.add_argument('--png-encoder', choices=('optimised', 'pillow'), default=PNG_ENCODER)
+    parser.add_argument('--number', type=int, default=200, help="calls per micro-benchmark round")
+    parser.add_argument('--repeat', type=int, default=5, help="micro-benchmark rounds (best is kept)")
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--output', '-o', default=os.path.join(BASE_DIR, "bench_results.json"))
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--save-baseline', metavar='FILE', help="also write the results to FILE")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative growth before a metric counts as a regression")
+    parser.add_argument('--e2e-case', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--case-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.e2e_case is not None:
+        run_e2e_case(args.e2e_case, args.jobs, args.png_encoder, args.case_output)
+        raise SystemExit(0)
+
+    baseline = None
+    if args.baseline:
+        if args.output and os.path.realpath(args.baseline) == os.path.realpath(args.output):
+            parser.error("--baseline is the --output file, which this run would overwrite; "
+                         "pass another --output or keep baselines with --save-baseline")
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    results = {'environment': environment(),
+               'settings': {'jobs': args.jobs, 'png_encoder': args.png_encoder}}
+    if not args.skip_micro:
+        results['micro'] = run_micro(args.number, args.repeat)
+        print(f"{'case':<10} {'ops':>4} {'compile us':>11} {'replay us':>10} {'draw us':>9}")
+        for case, r in results['micro'].items():
+            print(f"{case:<10} {r['ops']:>4} {r['compile_us']:>11.1f} {r['replay_us']:>10.1f} "
+                  f"{r['draw_us']:>9.1f}")
+    if args.sizes:
+        results['e2e'] = run_e2e(args.sizes, args.jobs, args.png_encoder)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+    if baseline is not None:
+        if baseline.get('settings') != results['settings']:
+            print(f"warning: baseline settings {baseline.get('settings')} differ from {results['settings']}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            raise SystemExit(1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Build a responsive resolution ladder for the background images.
+
+The biome, ranch and overworld backgrounds in ``assets/backgrounds`` are 2–3MB
+PNGs, far more than a phone screen needs. For every source PNG this script
+writes downscaled WebP and JPEG variants at each ladder width (never upscaling;
+the source width becomes the top rung when it is narrower than the largest
+requested width):
+
+``assets/backgrounds/ladder/<name>_<width>.webp``
+``assets/backgrounds/ladder/<name>_<width>.jpg``
+
+and a manifest, ``assets/backgrounds/manifest.json``, keyed by source file name
+(as used in ``BIOMES`` in ``main.js``).
+
+Each ``*_day.png`` biome background also gets a pre-rendered ``*_night.png``
+manifest entry (ladder only, no full-size PNG), darkened exactly like the
+``brightness(0.6)`` filter the game used to apply to the whole screen at night,
+so night time no longer needs a filter on the render path.
+
+Every entry also carries a few-hundred-byte blurred WebP placeholder (inline as
+a base64 ``data:`` URI) and the image's dominant colour. ``main.js`` loads the
+manifest once; ``setBackground`` paints the dominant colour and placeholder
+immediately, picks the smallest ladder variant that covers the viewport at
+the device pixel ratio, decodes it off-screen (WebP first, JPEG if that
+fails) and swaps it in, unless another background was requested meanwhile.
+Files missing from the manifest are used as plain full-size backgrounds.
+"""
+
+import argparse
+import base64
+import glob
+import io
+import json
+import os
+from PIL import Image, ImageFilter
+
+from generate_creatures import BASE_DIR, write_if_changed
+
+BACKGROUND_DIR = os.path.join(BASE_DIR, "assets", "backgrounds")
+LADDER_DIR = os.path.join(BACKGROUND_DIR, "ladder")
+MANIFEST_PATH = os.path.join(BACKGROUND_DIR, "manifest.json")
+LADDER_WIDTHS = (640, 1280, 1920)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+# Low-quality placeholder: width in pixels and WebP quality
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 40
+# Matches the ``brightness(0.6)`` filter main.js used to apply at night
+NIGHT_BRIGHTNESS = 0.6
+
+
+def ladder_widths(source_width, widths=LADDER_WIDTHS):
+    """Return the rung widths for a source, capped at (and including) its width."""
+    return sorted({min(w, source_width) for w in widths})
+
+
+def encode_variant(img, fmt):
+    buf = io.BytesIO()
+    if fmt == 'webp':
+        img.save(buf, format="WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def build_ladder(name, img, widths=LADDER_WIDTHS):
+    """Write every ladder variant of one image and return its manifest entry."""
+    stem = os.path.splitext(name)[0]
+    variants = []
+    for width in ladder_widths(img.width, widths):
+        height = round(img.height * width / img.width)
+        scaled = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        variant = {'width': width, 'height': height}
+        for fmt, ext in (('webp', 'webp'), ('jpeg', 'jpg')):
+            rel = f"ladder/{stem}_{width}.{ext}"
+            data = encode_variant(scaled, fmt)
+            write_if_changed(os.path.join(BACKGROUND_DIR, rel), data)
+            variant[fmt] = rel
+            variant[f'{fmt}Bytes'] = len(data)
+        variants.append(variant)
+    return {'width': img.width, 'height': img.height, 'variants': variants}
+
+
+def night_variant(img, brightness=NIGHT_BRIGHTNESS):
+    """Apply the CSS ``brightness()`` transfer (a clamped per-channel multiply)."""
+    return img.point([min(255, round(v * brightness)) for v in range(256)] * len(img.getbands()))
+
+
+def placeholder_data_uri(img, width=PLACEHOLDER_WIDTH):
+    """Return a tiny blurred WebP of ``img`` as a base64 ``data:`` URI."""
+    height = max(1, round(img.height * width / img.width))
+    tiny = img.resize((width, height), Image.BOX).filter(ImageFilter.GaussianBlur(0.6))
+    buf = io.BytesIO()
+    tiny.save(buf, format="WEBP", quality=PLACEHOLDER_QUALITY, method=6)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def dominant_colour(img, colours=5):
+    """Return the most common colour of a median-cut quantisation as ``#rrggbb``."""
+    small = img.copy()
+    small.thumbnail((64, 64))
+    quantised = small.quantize(colors=colours, method=Image.MEDIANCUT)
+    count, index = max(quantised.getcolors())
+    r, g, b = quantised.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+
+
+def build_backgrounds(widths=LADDER_WIDTHS):
+    """Build the ladder for every source PNG and update the manifest."""
+    os.makedirs(LADDER_DIR, exist_ok=True)
+    manifest = load_manifest()
+    for path in sorted(glob.glob(os.path.join(BACKGROUND_DIR, "*.png"))):
+        name = os.path.basename(path)
+        with Image.open(path) as src:
+            img = src.convert("RGB")
+        sources = [(name, img)]
+        if name.endswith("_day.png"):
+            sources.append((name.replace("_day.png", "_night.png"), night_variant(img)))
+        for key, source in sources:
+            entry = manifest.get(key, {})
+            entry.update(build_ladder(key, source, widths))
+            entry['placeholder'] = placeholder_data_uri(source)
+            entry['color'] = dominant_colour(source)
+            manifest[key] = entry
+            smallest = entry['variants'][0]
+            print(f"{key}: {os.path.getsize(path)} bytes -> "
+                  + ", ".join(f"{v['width']}w {v['webpBytes']}/{v['jpegBytes']}" for v in entry['variants'])
+                  + f" (webp/jpeg; smallest {min(smallest['webpBytes'], smallest['jpegBytes'])} bytes)")
+    save_manifest(manifest)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build responsive background variants.")
+    parser.add_argument('--widths', type=int, nargs='+', default=list(LADDER_WIDTHS),
+                        help="ladder widths in pixels")
+    args = parser.parse_args()
+    build_backgrounds(tuple(args.widths))
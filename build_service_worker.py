@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Generate a service worker for offline play and instant reloads.
+
+Works on the content-addressed store written by ``build_store.py`` (run it
+first, or pass ``--build-store``): hashed file names never change content, so
+the worker can answer from its caches without revalidating anything.
+
+The precache list is versioned by the store's manifest version and records the
+hash and size of every entry. It is split into
+
+``shell``          – ``index.html``, ``style.css``, ``main.js``, the sprite atlas,
+                     the background manifest and the overview levels of the
+                     overworld tile pyramid; cached when the worker installs
+``biomes.<key>``   – the individual sprites of one biome's creatures; cached
+                     when ``main.js`` reports that biome as current
+
+Files a bundled ``index.html`` (``bundle.py``) has inlined are left out.
+
+Everything else (background ladder variants, deeper map tiles) is cached
+lazily the first time it is fetched, in a runtime cache capped at
+``RUNTIME_CACHE_BYTES`` with least-recently-used eviction. All requests are
+answered cache-first, so a repeat visit makes no network requests for anything
+already seen.
+
+The worker is written to ``dist/sw.js`` and the precache list to
+``dist/precache-manifest.json``.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+
+from build_store import BASE_DIR, ENTRY_POINT, STORE_DIR, build_store, load_manifest
+
+MAIN_JS = os.path.join(BASE_DIR, "main.js")
+SHELL_FILES = (
+    "style.css",
+    "main.js",
+    "assets/creatures/atlas.json",
+    "assets/backgrounds/manifest.json",
+    "assets/backgrounds/overworld.dzi",
+)
+SHELL_PATTERNS = (r"assets/creatures/atlas_\d+\.png",)
+SPRITE_FOLDERS = ("base", "unique", "radiant", "silhouette")
+RUNTIME_CACHE_BYTES = 50 * 1024 * 1024
+
+SERVICE_WORKER_TEMPLATE = """// Generated by build_service_worker.py – do not edit.
+const PRECACHE = __PRECACHE__;
+const RUNTIME_CACHE_BYTES = __RUNTIME_CACHE_BYTES__;
+const PRECACHE_NAME = 'precache-' + PRECACHE.version;
+const RUNTIME_NAME = 'runtime';
+const LRU_KEY = '/__lru__';
+const SIZES = new Map();
+for (const group of Object.values(PRECACHE.groups)) {
+  for (const entry of group) SIZES.set(entry.url, entry.bytes);
+}
+for (const [url, bytes] of Object.entries(PRECACHE.sizes)) SIZES.set(url, bytes);
+
+function absolute(url) {
+  return new URL(url, self.registration.scope).href;
+}
+
+function precacheGroup(name) {
+  const group = PRECACHE.groups[name];
+  if (!group) return Promise.resolve();
+  return caches.open(PRECACHE_NAME).then(cache =>
+    Promise.all(group.map(entry => cache.match(absolute(entry.url)).then(hit =>
+      hit || cache.add(absolute(entry.url))))));
+}
+
+self.addEventListener('install', event => {
+  event.waitUntil(precacheGroup('shell').then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(caches.keys().then(keys => Promise.all(keys
+    .filter(key => key.startsWith('precache-') && key !== PRECACHE_NAME)
+    .map(key => caches.delete(key)))).then(() => self.clients.claim()));
+});
+
+// main.js reports the current biome so its sprites are available offline
+self.addEventListener('message', event => {
+  const data = event.data || {};
+  if (data.type === 'biome') event.waitUntil(precacheGroup('biomes.' + data.biome));
+});
+
+// Least-recently-used bookkeeping for the runtime cache: url -> [bytes, lastUsed]
+let lru = null;
+function loadLru(cache) {
+  if (lru) return Promise.resolve(lru);
+  return cache.match(LRU_KEY)
+    .then(res => (res ? res.json() : {}))
+    .then(data => (lru = new Map(Object.entries(data))));
+}
+
+function saveLru(cache) {
+  return cache.put(LRU_KEY, new Response(JSON.stringify(Object.fromEntries(lru))));
+}
+
+function touch(cache, url, bytes) {
+  return loadLru(cache).then(() => {
+    const previous = lru.get(url);
+    lru.set(url, [bytes !== undefined ? bytes : (previous ? previous[0] : 0), Date.now()]);
+    let total = 0;
+    for (const [size] of lru.values()) total += size;
+    const evicted = [];
+    const oldest = [...lru.entries()].sort((a, b) => a[1][1] - b[1][1]);
+    for (const [key, [size]] of oldest) {
+      if (total <= RUNTIME_CACHE_BYTES) break;
+      if (key === url) continue;
+      lru.delete(key);
+      total -= size;
+      evicted.push(cache.delete(key));
+    }
+    return Promise.all(evicted).then(() => saveLru(cache));
+  });
+}
+
+function runtimeFetch(request, event) {
+  return caches.open(RUNTIME_NAME).then(cache => cache.match(request).then(hit => {
+    if (hit) {
+      event.waitUntil(touch(cache, request.url));
+      return hit;
+    }
+    return fetch(request).then(res => {
+      if (res.ok && res.type === 'basic') {
+        const path = new URL(request.url).pathname.replace(new URL(self.registration.scope).pathname, '');
+        const bytes = SIZES.get(path) || Number(res.headers.get('Content-Length')) || 0;
+        event.waitUntil(cache.put(request, res.clone()).then(() => touch(cache, request.url, bytes)));
+      }
+      return res;
+    });
+  }));
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET' || new URL(request.url).origin !== self.location.origin) return;
+  // Navigations get the precached index.html
+  const lookup = request.mode === 'navigate' ? absolute('index.html') : request;
+  event.respondWith(caches.open(PRECACHE_NAME)
+    .then(cache => cache.match(lookup))
+    .then(hit => hit || runtimeFetch(request, event)));
+});
+"""
+
+
+def overview_tiles(files, dzi_path="assets/backgrounds/overworld.dzi", base_dir=BASE_DIR):
+    """Return the tile paths of every pyramid level that fits in a single tile."""
+    with open(os.path.join(base_dir, dzi_path), "r", encoding="utf-8") as fh:
+        text = fh.read()
+    attrs = dict(re.findall(r'(\w+)="([^"]*)"', text))
+    largest = max(int(attrs["Width"]), int(attrs["Height"]))
+    max_level = math.ceil(math.log2(largest))
+    overview = max_level - max(0, math.ceil(math.log2(largest / int(attrs["TileSize"]))))
+    tile_dir = dzi_path[:-len(".dzi")] + "_files/"
+    return [f"{tile_dir}{level}/0_0.{attrs['Format']}" for level in range(overview + 1)
+            if f"{tile_dir}{level}/0_0.{attrs['Format']}" in files]
+
+
+def biome_keys(main_js=MAIN_JS):
+    """Return the keys of the ``BIOMES`` table in main.js."""
+    with open(main_js, "r", encoding="utf-8") as fh:
+        source = fh.read()
+    body = source[source.index("const BIOMES = {"):]
+    body = body[:body.index("\n  };")]
+    return re.findall(r"^    (\w+): \{", body, re.MULTILINE)
+
+
+def precache_list(files, version, index_data):
+    """Split the store manifest into precache groups of ``{url, sha256, bytes}``."""
+    def entry(path):
+        info = files[path]
+        return {'url': info['path'], 'sha256': info['sha256'], 'bytes': info['bytes']}
+
+    shell = [p for p in SHELL_FILES if p in files]
+    shell += [p for p in sorted(files) if any(re.fullmatch(pat, p) for pat in SHELL_PATTERNS)]
+    shell += overview_tiles(files)
+    index = {'url': ENTRY_POINT, 'sha256': hashlib.sha256(index_data).hexdigest(), 'bytes': len(index_data)}
+    groups = {'shell': [index] + [entry(p) for p in shell]}
+    for biome in biome_keys():
+        groups[f'biomes.{biome}'] = [
+            entry(p) for p in sorted(files)
+            if any(p.startswith(f"assets/creatures/{folder}/{biome}_") for folder in SPRITE_FOLDERS)]
+    # A bundled index.html (bundle.py) inlines some of these; skip what it no longer references
+    text = index_data.decode("utf-8")
+    groups = {name: [e for e in group if e is index or e['url'] in text] for name, group in groups.items()}
+    precached = {e['url'] for group in groups.values() for e in group}
+    # Sizes of everything else, for the runtime cache's byte accounting
+    sizes = {info['path']: info['bytes'] for info in files.values() if info['path'] not in precached}
+    return {'version': version, 'groups': groups, 'sizes': sizes}
+
+
+def build_service_worker(out_dir=STORE_DIR, runtime_bytes=RUNTIME_CACHE_BYTES):
+    manifest = load_manifest(os.path.join(out_dir, "asset-manifest.json"))
+    if not manifest:
+        raise SystemExit(f"No asset manifest in {out_dir}; run build_store.py first")
+    with open(os.path.join(out_dir, ENTRY_POINT), "rb") as fh:
+        index_data = fh.read()
+    precache = precache_list(manifest['files'], manifest['version'], index_data)
+    with open(os.path.join(out_dir, "precache-manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(precache, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+    worker = (SERVICE_WORKER_TEMPLATE
+              .replace("__PRECACHE__", json.dumps(precache, separators=(",", ":"), sort_keys=True))
+              .replace("__RUNTIME_CACHE_BYTES__", str(runtime_bytes)))
+    with open(os.path.join(out_dir, "sw.js"), "w", encoding="utf-8") as fh:
+        fh.write(worker)
+    for name, group in precache['groups'].items():
+        print(f"{name:<18} {len(group):>4} files {sum(e['bytes'] for e in group):>9} bytes")
+    print(f"Wrote sw.js (version {manifest['version']}, runtime cache cap {runtime_bytes} bytes)")
+    return precache
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate the offline service worker.")
+    parser.add_argument('--out', default=STORE_DIR, help="store directory (default: dist)")
+    parser.add_argument('--build-store', action='store_true', help="run build_store.py first")
+    parser.add_argument('--runtime-cache-mb', type=float, default=RUNTIME_CACHE_BYTES / 1024 / 1024,
+                        help="size cap of the lazily filled runtime cache")
+    args = parser.parse_args()
+    if args.build_store:
+        build_store(args.out)
+    build_service_worker(args.out, int(args.runtime_cache_mb * 1024 * 1024))
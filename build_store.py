@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Publish the game into a content-addressed output directory.
+
+Every file the game serves (``style.css``, ``main.js`` and everything under
+``assets/``: creature sprites, atlas pages, background ladders and map tiles)
+is copied to
+
+``dist/static/<sha256 prefix>.<ext>``
+
+so a file's name changes exactly when its content does and every blob can be
+served with immutable, long-lived cache headers. Files with identical content
+are stored once. ``dist/index.html`` is rewritten to reference the hashed
+stylesheet and script, and gets the logical-path → hashed-path map inlined as
+``window.ASSET_MANIFEST``; ``main.js`` resolves every asset URL through that map
+(``assetUrl``), so it keeps working unbuilt in a development checkout.
+
+``dist/asset-manifest.json`` records path, hash and size per logical file. When
+a previous manifest exists, the report lists how many blobs (and bytes) changed,
+i.e. what returning players have to download again. Blobs from earlier builds
+are kept so clients still holding an old ``index.html`` keep working; use
+``--prune`` to remove the ones the current build no longer references.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "dist")
+STATIC_PREFIX = "static/"
+HASH_LENGTH = 16
+ENTRY_POINT = "index.html"
+TOP_LEVEL_SOURCES = ("style.css", "main.js")
+ASSET_ROOT = "assets"
+# Build bookkeeping that is never served
+SKIP_NAMES = {"build_manifest.json"}
+
+
+def collect_sources(base_dir=BASE_DIR):
+    """Return the logical (URL) paths of every served file, sorted."""
+    paths = [p for p in TOP_LEVEL_SOURCES if os.path.isfile(os.path.join(base_dir, p))]
+    for root, dirs, files in os.walk(os.path.join(base_dir, ASSET_ROOT)):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if name.startswith(".") or name in SKIP_NAMES:
+                continue
+            paths.append(os.path.relpath(os.path.join(root, name), base_dir).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def hashed_name(digest, path):
+    return STATIC_PREFIX + digest[:HASH_LENGTH] + os.path.splitext(path)[1].lower()
+
+
+def store_blob(out_dir, name, data):
+    """Write a blob unless the store already has it; returns True if written."""
+    target = os.path.join(out_dir, name)
+    if os.path.exists(target):
+        return False
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, target)
+    return True
+
+
+def rewrite_index(html, mapping):
+    """Point ``href``/``src`` attributes at hashed files and inline the map."""
+    def replace(match):
+        attr, path = match.group(1), match.group(2)
+        return f'{attr}="{mapping.get(path, path)}"'
+    html = re.sub(r'\b(href|src)="([^"]+)"', replace, html)
+    inline = ("<script>window.ASSET_MANIFEST = "
+              + json.dumps(mapping, separators=(",", ":"), sort_keys=True)
+              + ";</script>\n  ")
+    script = f'<script src="{mapping["main.js"]}"></script>'
+    return html.replace(script, inline + script, 1)
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_store(out_dir=STORE_DIR, prune=False):
+    """Copy every served file into the store and write the manifest and index."""
+    os.makedirs(os.path.join(out_dir, STATIC_PREFIX), exist_ok=True)
+    manifest_path = os.path.join(out_dir, "asset-manifest.json")
+    previous = load_manifest(manifest_path).get("files", {})
+
+    files = {}
+    blobs = {}
+    duplicate_bytes = 0
+    written = 0
+    for path in collect_sources():
+        with open(os.path.join(BASE_DIR, path), "rb") as fh:
+            data = fh.read()
+        digest = hashlib.sha256(data).hexdigest()
+        name = hashed_name(digest, path)
+        if name in blobs:
+            duplicate_bytes += len(data)
+        else:
+            blobs[name] = len(data)
+            written += store_blob(out_dir, name, data)
+        files[path] = {'path': name, 'sha256': digest, 'bytes': len(data)}
+
+    mapping = {path: entry['path'] for path, entry in files.items()}
+    with open(os.path.join(BASE_DIR, ENTRY_POINT), "r", encoding="utf-8") as fh:
+        index = rewrite_index(fh.read(), mapping)
+    with open(os.path.join(out_dir, ENTRY_POINT), "w", encoding="utf-8") as fh:
+        fh.write(index)
+
+    version = hashlib.sha256(json.dumps(mapping, sort_keys=True).encode("utf-8")).hexdigest()
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump({'version': version[:HASH_LENGTH], 'files': files}, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+
+    removed = 0
+    if prune:
+        static_dir = os.path.join(out_dir, STATIC_PREFIX)
+        for name in os.listdir(static_dir):
+            # Keep precompressed siblings (serve.py --precompress) of live blobs
+            if STATIC_PREFIX + re.sub(r"\.(br|gz)$", "", name) not in blobs:
+                os.remove(os.path.join(static_dir, name))
+                removed += 1
+
+    old_blobs = {entry['path'] for entry in previous.values()}
+    changed = {name: size for name, size in blobs.items() if name not in old_blobs}
+    print(f"{len(files)} files -> {len(blobs)} blobs ({sum(blobs.values())} bytes, "
+          f"{duplicate_bytes} bytes deduplicated), {written} new in store"
+          + (f", {removed} pruned" if prune else ""))
+    if previous:
+        print(f"Changed since last build: {len(changed)} blobs, {sum(changed.values())} bytes")
+    print(f"Wrote {os.path.relpath(os.path.join(out_dir, ENTRY_POINT), BASE_DIR)} "
+          f"(version {version[:HASH_LENGTH]})")
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the content-addressed asset store.")
+    parser.add_argument('--out', default=STORE_DIR, help="output directory (default: dist)")
+    parser.add_argument('--prune', action='store_true',
+                        help="delete blobs no longer referenced by this build")
+    args = parser.parse_args()
+    build_store(args.out, prune=args.prune)
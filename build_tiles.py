@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cut a large image into a Deep Zoom (DZI) tile pyramid.
+
+The overworld map used to be loaded as one 2.5MB PNG at startup. This script
+cuts ``assets/backgrounds/overworld.png`` (or any image given on the command
+line) into the standard Deep Zoom layout:
+
+``<name>.dzi``                      – XML descriptor (size, tile size, overlap, format)
+``<name>_files/<level>/<col>_<row>.<format>`` – tiles for every pyramid level
+
+Level ``L`` holds the image scaled by ``2 ** (L - max_level)``, where
+``max_level = ceil(log2(max(width, height)))`` is full resolution and level 0
+is a single pixel, so the map viewer in ``main.js`` can show a one-tile
+overview instantly and then request only the tiles visible at the current zoom.
+The layout is independent of the source size, so it keeps working for much
+larger world maps.
+"""
+
+import argparse
+import math
+import os
+import shutil
+from PIL import Image
+
+from generate_creatures import BASE_DIR
+
+DEFAULT_SOURCE = os.path.join(BASE_DIR, "assets", "backgrounds", "overworld.png")
+TILE_SIZE = 256
+OVERLAP = 1
+
+DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{tile_size}" Overlap="{overlap}" Format="{fmt}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def save_tile(img, path, fmt, quality):
+    if fmt == 'jpg':
+        img.save(path, format="JPEG", quality=quality, optimize=True)
+    else:
+        img.save(path, format="WEBP", quality=quality, method=6)
+
+
+def build_pyramid(source=DEFAULT_SOURCE, tile_size=TILE_SIZE, overlap=OVERLAP, fmt='jpg', quality=80):
+    """Write the DZI descriptor and tile pyramid next to ``source``."""
+    stem = os.path.splitext(source)[0]
+    tiles_dir = stem + "_files"
+    with Image.open(source) as src:
+        img = src.convert("RGB")
+    width, height = img.size
+    max_level = math.ceil(math.log2(max(width, height)))
+
+    shutil.rmtree(tiles_dir, ignore_errors=True)
+    count = 0
+    total = 0
+    level_img = img
+    for level in range(max_level, -1, -1):
+        factor = 2 ** (max_level - level)
+        size = (math.ceil(width / factor), math.ceil(height / factor))
+        if level_img.size != size:
+            # Halve the previous level rather than rescaling the full image
+            level_img = level_img.resize(size, Image.LANCZOS)
+        level_dir = os.path.join(tiles_dir, str(level))
+        os.makedirs(level_dir)
+        for col in range(math.ceil(size[0] / tile_size)):
+            for row in range(math.ceil(size[1] / tile_size)):
+                box = (max(0, col * tile_size - overlap), max(0, row * tile_size - overlap),
+                       min(size[0], (col + 1) * tile_size + overlap),
+                       min(size[1], (row + 1) * tile_size + overlap))
+                path = os.path.join(level_dir, f"{col}_{row}.{fmt}")
+                save_tile(level_img.crop(box), path, fmt, quality)
+                count += 1
+                total += os.path.getsize(path)
+
+    with open(stem + ".dzi", "w", encoding="utf-8") as fh:
+        fh.write(DZI_TEMPLATE.format(tile_size=tile_size, overlap=overlap, fmt=fmt,
+                                     width=width, height=height))
+    print(f"{os.path.basename(source)}: {width}x{height}, {max_level + 1} levels, "
+          f"{count} tiles, {total} bytes")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build a Deep Zoom tile pyramid.")
+    parser.add_argument('source', nargs='?', default=DEFAULT_SOURCE, help="image to tile")
+    parser.add_argument('--tile-size', type=int, default=TILE_SIZE)
+    parser.add_argument('--overlap', type=int, default=OVERLAP)
+    parser.add_argument('--format', choices=('jpg', 'webp'), default='jpg')
+    parser.add_argument('--quality', type=int, default=80)
+    args = parser.parse_args()
+    build_pyramid(args.source, args.tile_size, args.overlap, args.format, args.quality)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Bundle the game into a single HTML file for production.
+
+Builds on the content-addressed store from ``build_store.py`` (pass
+``--build-store`` to refresh it first) and replaces ``dist/index.html`` with a
+version that needs no other request before first paint:
+
+* ``style.css`` and ``main.js`` are minified and inlined;
+* the background manifest (with its inline placeholders) and the overworld
+  ``.dzi`` descriptor are inlined as ``data:`` URIs;
+* creature sprites at or below ``--max-inline`` bytes are inlined as ``data:``
+  URIs, either the individual PNGs (``--sprites individual``; the atlas is
+  then disabled so nothing fetches it) or the atlas pages and frame map
+  (``--sprites atlas``).
+
+Inlining works through the ``window.ASSET_MANIFEST`` map that ``main.js``
+resolves every asset path with (``assetUrl``), so the ``baseImg``/``uniqueImg``
+paths built in ``CREATURES`` pick up the ``data:`` URIs without touching the
+script. Everything else keeps its hashed store path; the first screen only
+fetches its background ladder variant.
+
+The minifiers are deliberately conservative: comments and indentation are
+removed, but line breaks are kept so automatic semicolon insertion in
+``main.js`` is unaffected.
+"""
+
+import argparse
+import base64
+import json
+import mimetypes
+import os
+import re
+
+from build_store import BASE_DIR, ENTRY_POINT, STORE_DIR, build_store, load_manifest
+
+MAX_INLINE_BYTES = 4096
+# Needed before first paint, inlined regardless of size
+INLINE_ALWAYS = ("assets/backgrounds/manifest.json", "assets/backgrounds/overworld.dzi")
+SPRITE_PATTERN = re.compile(r"assets/creatures/(base|unique|radiant|silhouette)/[^/]+\.png")
+ATLAS_PATTERN = re.compile(r"assets/creatures/atlas(_\d+\.png|\.json)")
+ATLAS_JSON = "assets/creatures/atlas.json"
+# Characters after which a ``/`` starts a regular expression rather than a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of")
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet."""
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.DOTALL)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};:,>])\s*", r"\1", source)
+    return source.replace(";}", "}").strip()
+
+
+def _strip_js_comments(source):
+    """Remove comments, honouring strings, template literals and regex literals."""
+    out = []
+    i, n = 0, len(source)
+    templates = []  # brace depth at each open ``${`` of enclosing template literals
+    last = ""  # last significant character emitted
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ""
+        if ch == "/" and nxt == "/":
+            while i < n and source[i] != "\n":
+                i += 1
+            continue
+        if ch == "/" and nxt == "*":
+            end = source.index("*/", i + 2)
+            out.append(" " if "\n" not in source[i:end] else "\n")
+            i = end + 2
+            continue
+        if ch in "'\"" or ch == "`" or (ch == "}" and templates and templates[-1] == 0):
+            if ch == "}":
+                templates.pop()
+                quote = "`"
+            else:
+                quote = ch
+            start = i
+            i += 1
+            while i < n:
+                if source[i] == "\\":
+                    i += 2
+                    continue
+                if source[i] == quote:
+                    i += 1
+                    break
+                if quote == "`" and source.startswith("${", i):
+                    templates.append(0)
+                    i += 2
+                    break
+                i += 1
+            out.append(source[start:i])
+            last = quote
+            continue
+        if ch == "/":
+            word = re.search(r"(\w+)\s*$", "".join(out[-4:]))
+            if last in REGEX_PRECEDERS or not last or (word and word.group(1) in REGEX_KEYWORDS):
+                start = i
+                i += 1
+                in_class = False
+                while i < n:
+                    c = source[i]
+                    if c == "\\":
+                        i += 2
+                        continue
+                    if c == "[":
+                        in_class = True
+                    elif c == "]":
+                        in_class = False
+                    elif c == "/" and not in_class:
+                        i += 1
+                        break
+                    i += 1
+                while i < n and source[i].isalpha():
+                    i += 1
+                out.append(source[start:i])
+                last = "/"
+                continue
+        if templates:
+            if ch == "{":
+                templates[-1] += 1
+            elif ch == "}":
+                templates[-1] -= 1
+        out.append(ch)
+        if not ch.isspace():
+            last = ch
+        i += 1
+    return "".join(out)
+
+
+def minify_js(source):
+    """Strip comments, indentation and blank lines, keeping line breaks."""
+    lines = (line.strip() for line in _strip_js_comments(source).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def data_uri(path, data):
+    mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if path.endswith(".dzi"):
+        mime = "application/xml"
+    return f"data:{mime};base64," + base64.b64encode(data).decode("ascii")
+
+
+def inline_script(source):
+    """Guard an inlined script against closing its own ``<script>`` element."""
+    return re.sub(r"</(script)", r"<\\/\1", source, flags=re.IGNORECASE)
+
+
+def bundle(out_dir=STORE_DIR, max_inline=MAX_INLINE_BYTES, sprites='individual'):
+    """Write the single-file ``index.html`` into the store directory."""
+    manifest = load_manifest(os.path.join(out_dir, "asset-manifest.json"))
+    if not manifest:
+        raise SystemExit(f"No asset manifest in {out_dir}; run build_store.py first")
+    files = manifest['files']
+    mapping = {path: entry['path'] for path, entry in files.items()}
+
+    def read(path):
+        with open(os.path.join(BASE_DIR, path), "rb") as fh:
+            return fh.read()
+
+    inlined = [p for p in INLINE_ALWAYS if p in files]
+    pattern = SPRITE_PATTERN if sprites == 'individual' else ATLAS_PATTERN
+    candidates = [p for p in sorted(files) if pattern.fullmatch(p)]
+    inlined += [p for p in candidates if files[p]['bytes'] <= max_inline]
+    for path in inlined:
+        mapping[path] = data_uri(path, read(path))
+    if sprites == 'individual' and candidates and all(p in inlined for p in candidates):
+        # Every sprite is inline; an empty frame map makes main.js skip the atlas
+        mapping[ATLAS_JSON] = "data:application/json,null"
+        for path in files:
+            if ATLAS_PATTERN.fullmatch(path) and path != ATLAS_JSON:
+                del mapping[path]
+    for path in ("style.css", "main.js"):
+        del mapping[path]
+
+    css = minify_css(read("style.css").decode("utf-8"))
+    js = inline_script(minify_js(read("main.js").decode("utf-8")))
+    assets = inline_script(json.dumps(mapping, separators=(",", ":"), sort_keys=True))
+    with open(os.path.join(BASE_DIR, ENTRY_POINT), "r", encoding="utf-8") as fh:
+        html = fh.read()
+    html = re.sub(r'<link rel="stylesheet" href="style\.css">', lambda m: f"<style>{css}</style>", html)
+    html = html.replace('<script src="main.js"></script>',
+                        f"<script>window.ASSET_MANIFEST = {assets};</script>\n  <script>\n{js}\n</script>")
+    html = re.sub(r"<!--.*?-->\s*", "", html, flags=re.DOTALL)
+    with open(os.path.join(out_dir, ENTRY_POINT), "w", encoding="utf-8") as fh:
+        fh.write(html)
+
+    source_bytes = sum(len(read(p)) for p in (ENTRY_POINT, "style.css", "main.js"))
+    inline_bytes = sum(files[p]['bytes'] for p in inlined)
+    print(f"index.html: {len(html.encode('utf-8'))} bytes (html/css/js {source_bytes} bytes unminified, "
+          f"{len(inlined)} assets / {inline_bytes} bytes inlined)")
+    return html
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bundle the game into a single index.html.")
+    parser.add_argument('--out', default=STORE_DIR, help="store directory (default: dist)")
+    parser.add_argument('--build-store', action='store_true', help="run build_store.py first")
+    parser.add_argument('--max-inline', type=int, default=MAX_INLINE_BYTES,
+                        help="inline sprite files up to this many bytes")
+    parser.add_argument('--sprites', choices=('individual', 'atlas'), default='individual',
+                        help="inline the individual sprite PNGs or the atlas pages")
+    args = parser.parse_args()
+    if args.build_store:
+        build_store(args.out)
+    bundle(args.out, args.max_inline, args.sprites)
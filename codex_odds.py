@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Exact completion-time distributions for the codex.
+
+Uses the same rules as ``simulate_encounters.py`` (read from ``main.js``),
+but computes the distributions instead of sampling them. In a pool, every
+encounter independently catches a given missing ``(creature, variant)`` with
+odds ``r = 1/pool × variant odds × catch rate`` (``key_rates``). An escape
+leaves the variant missing, so the next encounter of it is simply another
+draw with the same odds. The encounters ``T`` needed to complete one
+variant tier of a pool are then a coupon collector with unequal
+probabilities over that tier's keys, and
+
+    P(T ≤ n) = Σ_S (-1)^|S| (1 - r(S))^n
+
+over subsets ``S`` of keys, ``r(S)`` being their summed odds. Keys with
+equal odds are grouped, so a five-creature pool is at most 32 terms. Mean
+and variance follow in closed form from ``Σ_n P(T > n)`` and
+``Σ_n (2n + 1) P(T > n)``.
+
+The alternating sum loses precision as keys are added (its terms grow like
+``2^keys``), so pools with more than ``MAX_TERM_KEYS`` keys use the
+equivalent generating function instead,
+
+    P(T ≤ n) = n! [z^n] e^z F(z),    F(t) = Π_k (1 - e^{-r_k t}),
+
+where ``F`` is the completion CDF of the same hunt in continuous time with
+encounters as a rate-one Poisson process. The coefficient is a Cauchy
+integral on the circle ``|z| = n`` (the saddle point of ``e^z z^-n``). All
+terms of ``e^z F(z)`` are positive, so it has no cancellation. For small
+``n`` one FFT around the circle yields every coefficient within a few
+standard deviations of its centre. For large ``n`` the integrand is
+negligible outside a short arc around the real axis, and Gauss–Legendre
+nodes on that arc cost the same whatever ``n`` is. Mean and variance of
+those pools come from the continuous-time hunt ``τ``: ``E[T] = E[τ]`` and
+``Var T = Var τ - E[τ]``, as ``τ`` is ``T`` exponential gaps. Both methods
+group keys by odds, so the cost depends on the number of distinct catch
+rates rather than on pool size: summarising one pool takes a few tens of
+milliseconds whether it holds thirteen creatures or fifty thousand.
+
+Codex totals (every pool hunted to the tier, one after another) have exact
+means and variances. Their quantiles come from convolving the per-pool
+distributions binned on a common grid of ``TOTAL_BINS`` bins, and are
+reported with the bin width as their resolution. The grid ends where the
+union bound ``Σ_k (1 - r_k)^n`` drops below ``TAIL``, since exact CDF values
+that close to one are too noisy to search. When a pool spans more than a
+few thousand bins its CDF is evaluated exactly at ``CDF_POINTS`` knots and
+interpolated in between (see ``_interpolated_cdf``). Pools with the same
+odds share their results, so the game's ten pools cost as much as two. A
+full run takes about 0.2 s for the game and 0.5–1.2 s with ``--pool-size``
+anywhere from 13 to 50000.
+
+``--check`` compares the two methods on the game's pools and the exact
+means with ``simulate_encounters.py``.
+"""
+
+import argparse
+import json
+import math
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from simulate_encounters import VARIANTS, Pool, key_rates, load_rules, simulate_batch
+
+MAX_TERM_KEYS = 12
+QUANTILES = (0.1, 0.5, 0.9, 0.99)
+TOTAL_BINS = 1 << 18
+TAIL = 1e-12
+# Exact CDF values per pool behind the binned codex convolution, see
+# _interpolated_cdf
+CDF_POINTS = 512
+# Saddle-point integrals stop where the integrand is below e^-ARC_CUTOFF of
+# its peak, sampled with ARC_NODES Gauss–Legendre nodes when r0 = 1 (more as
+# r0 falls and the arc widens relative to the peak)
+ARC_CUTOFF = 40.0
+ARC_NODES = 64
+
+
+def rate_groups(rates):
+    """Group per-key odds into a hashable ``((rate, ...), (count, ...))`` of distinct values."""
+    rates = np.asarray(rates, dtype=np.float64).ravel()
+    if (rates <= 0).any():
+        raise ValueError("a key with zero odds can never be caught")
+    values, counts = np.unique(rates, return_counts=True)
+    return tuple(values.tolist()), tuple(counts.tolist())
+
+
+def _pick_method(groups, method):
+    keys = sum(groups[1])
+    if method == 'terms' and keys > MAX_TERM_KEYS:
+        raise ValueError(f"inclusion–exclusion is limited to {MAX_TERM_KEYS} keys, "
+                         f"this pool has {keys}; use the saddle method")
+    return method or ('terms' if keys <= MAX_TERM_KEYS else 'saddle')
+
+
+def _subset_terms(groups):
+    """Return ``(coefficients, odds)`` of the inclusion–exclusion sum."""
+    coef = np.ones(1)
+    odds = np.zeros(1)
+    for rate, count in zip(*groups):
+        picks = np.arange(count + 1)
+        weights = np.array([math.comb(count, int(s)) for s in picks]) * (-1.0) ** picks
+        coef = (coef[:, None] * weights[None, :]).ravel()
+        odds = (odds[:, None] + rate * picks[None, :]).ravel()
+    return coef, odds
+
+
+def _cdf_terms(groups, ns):
+    coef, odds = _subset_terms(groups)
+    ns = np.asarray(ns, dtype=np.float64)
+    # (1 - r)^n; the empty subset (odds 0) contributes 1
+    powers = np.exp(np.multiply.outer(ns, np.log1p(-np.minimum(odds, 1.0))))
+    return np.clip(powers @ coef, 0.0, 1.0)
+
+
+def _log_completion(groups, z):
+    """``log F(z)`` for complex ``z``; only ever exponentiated, so any branch will do."""
+    rates, counts = map(np.array, groups)
+    w = np.multiply.outer(z, rates)
+    # 1 - e^{-w} in real arithmetic, about twice as fast as complex expm1 and
+    # log; the real part is written so that it does not cancel for small w
+    decay = np.exp(-w.real)
+    x = -np.expm1(-w.real) + 2 * decay * np.sin(w.imag / 2) ** 2
+    y = decay * np.sin(w.imag)
+    with np.errstate(divide='ignore'):
+        return (np.log(np.hypot(x, y)) + 1j * np.arctan2(y, x)) @ counts
+
+
+def _log_stirling(n):
+    """``log(n!) - n log n + n`` for an array of ``n``, without the cancellation of computing it directly."""
+    n = np.asarray(n, dtype=np.float64)
+    out = 0.5 * np.log(2 * np.pi * n) + 1 / (12 * n) - 1 / (360 * n ** 3) + 1 / (1260 * n ** 5)
+    small = n < 100
+    out[small] = [math.lgamma(k + 1) - k * math.log(k) + k for k in n[small]]
+    return out
+
+
+@lru_cache(maxsize=None)
+def _legendre(nodes):
+    return np.polynomial.legendre.leggauss(nodes)
+
+
+def _circle_coefficients(groups, centre, peak, m):
+    """Coefficients of ``e^z F(z)`` at ``z^m``, times ``centre^m / (e^centre F(centre))``.
+
+    One FFT of the integrand on ``|z| = centre``, ``peak`` being
+    ``log F(centre)``; good for every ``m`` within a few standard deviations
+    of ``centre``.
+    """
+    size = 1 << math.ceil(math.log2(16 * math.sqrt(centre) + 64))
+    circle = np.exp(2j * np.pi * np.arange(size) / size)
+    log_f = _log_completion(groups, centre * circle)
+    coeffs = np.fft.fft(np.exp(centre * (circle - 1) + log_f - peak)).real / size
+    return coeffs[m % size]
+
+
+def _arc_coefficients(groups, centres, peaks, m, window):
+    """As ``_circle_coefficients`` for many windows, integrating over an arc only.
+
+    ``m[i]`` belongs to the window with ``centres[window[i]]``.
+    ``e^z F(z) = e^{r0 z} Π (e^{r z} - 1)`` has positive coefficients, so the
+    integrand is below ``e^{r0 centre (cos θ - 1)}`` of its peak; on ``|θ| ≤
+    arc`` that bound stays above ``e^-ARC_CUTOFF``, and Gauss–Legendre nodes
+    there replace the full circle at a cost that does not grow with
+    ``centre``.
+    """
+    residual = 1.0 - sum(rate * count for rate, count in zip(*groups))
+    arcs = np.arccos(1 - ARC_CUTOFF / (residual * centres))
+    nodes, weights = _legendre(16 * math.ceil(ARC_NODES / (16 * math.sqrt(residual))))
+    theta = arcs[:, None] * nodes[None, :]
+    # centre (e^{iθ} - 1) split into its decay and its phase, both kept small
+    level = (-2 * centres[:, None] * np.sin(theta / 2) ** 2 - peaks[:, None]
+             + _log_completion(groups, centres[:, None] * np.exp(1j * theta)))
+    level = level + 1j * centres[:, None] * (np.sin(theta) - theta)
+    out = np.empty(len(m))
+    for lo in range(0, len(m), 4096):
+        win, part = window[lo:lo + 4096], m[lo:lo + 4096]
+        terms = np.exp(level[win] + 1j * (centres[win] - part)[:, None] * theta[win])
+        out[lo:lo + 4096] = terms.real @ weights * arcs[win] / (2 * np.pi)
+    return out
+
+
+def _cdf_saddle(groups, ns):
+    """``P(T ≤ n)`` for integer ``ns`` from windowed Cauchy integrals."""
+    ns = np.asarray(ns, dtype=np.int64)
+    out = np.zeros(ns.shape)
+    todo = np.flatnonzero(ns >= sum(groups[1]))
+    order = todo[np.argsort(ns[todo])]
+    m = ns[order]
+    # each window spans ±2 standard deviations of e^z z^-n around its centre
+    starts, centres = [], []
+    start = 0
+    while start < m.size:
+        half = int(2 * math.sqrt(m[start]) + 4)
+        starts.append(start)
+        centres.append(int(m[start]) + half)
+        start = np.searchsorted(m, centres[-1] + half, side='right')
+    centres = np.array(centres, dtype=np.int64)
+    window = np.repeat(np.arange(len(starts)), np.diff(starts + [m.size]))
+    peaks = _log_completion(groups, centres.astype(np.float64)).real
+    coeffs = np.empty(m.size)
+    residual = 1.0 - sum(rate * count for rate, count in zip(*groups))
+    arc = residual * centres > 2 * ARC_CUTOFF
+    on_arc = arc[window]
+    if on_arc.any():
+        # renumber the arc windows so they index the reduced centre array
+        renumber = np.cumsum(arc) - 1
+        coeffs[on_arc] = _arc_coefficients(groups, centres[arc], peaks[arc], m[on_arc],
+                                           renumber[window[on_arc]])
+    for w in np.flatnonzero(~arc):
+        points = window == w
+        coeffs[points] = _circle_coefficients(groups, centres[w], peaks[w], m[points])
+    # log(m! centre^-m e^centre) = R(m) + m log(m / centre) - (m - centre)
+    # for the Stirling remainder R, with no large terms left to cancel
+    centre = centres[window]
+    log_scale = _log_stirling(m) + m * np.log1p((m - centre) / centre) - (m - centre) + peaks[window]
+    out[order] = np.clip(np.exp(log_scale) * coeffs, 0.0, 1.0)
+    return out
+
+
+def tier_cdf(groups, ns, method=None):
+    """Exact ``P(T ≤ n)`` for a pool tier given its ``rate_groups``."""
+    method = _pick_method(groups, method)
+    return (_cdf_terms if method == 'terms' else _cdf_saddle)(groups, ns)
+
+
+def _continuous_tail(groups, t):
+    """``1 - F(t)`` of the continuous-time hunt, computed without cancellation."""
+    rates, counts = map(np.array, groups)
+    with np.errstate(divide='ignore'):
+        log_f = (counts[None, :] * np.log(-np.expm1(-np.multiply.outer(t, rates)))).sum(axis=1)
+    return -np.expm1(log_f)
+
+
+@lru_cache(maxsize=None)
+def tier_moments(groups, method=None):
+    """Return the exact ``(mean, std)`` of a pool tier's completion time."""
+    if _pick_method(groups, method) == 'terms':
+        coef, odds = _subset_terms(groups)
+        coef, odds = -coef[1:], odds[1:]
+        mean = coef @ (1.0 / odds)
+        second = coef @ ((2.0 - odds) / odds ** 2)
+        return mean, math.sqrt(max(0.0, second - mean ** 2))
+    # 1 - F(t) < 1e-18 beyond t_max; Simpson's rule on a grid of at least 64
+    # steps per 1/r of the fastest key
+    t_max = max((math.log(count) + 42) / rate for rate, count in zip(*groups))
+    steps = 1 << min(20, max(10, math.ceil(math.log2(64 * t_max * max(groups[0])))))
+    grid = np.linspace(0.0, t_max, steps + 1)
+    tail = _continuous_tail(groups, grid)
+    weights = np.ones(grid.size)
+    weights[1:-1:2], weights[2:-1:2] = 4, 2
+    step = grid[1] / 3
+    mean = step * (weights @ tail)
+    second = step * (weights @ (2 * grid * tail))
+    return mean, math.sqrt(max(0.0, second - mean ** 2 - mean))
+
+
+@lru_cache(maxsize=None)
+def tier_quantile(groups, q, method=None):
+    """Smallest ``n`` with ``P(T ≤ n) ≥ q``."""
+    low = sum(groups[1]) - 1
+    high = max(low + 1, int(tier_moments(groups, method)[0]))
+    while tier_cdf(groups, [high], method)[0] < q:
+        low, high = high, high * 2
+    # one call per round probes 32 points, which costs little more than one
+    while high - low > 1:
+        probes = np.unique(np.linspace(low, high, 34).astype(np.int64)[1:-1])
+        reached = tier_cdf(groups, probes, method) >= q
+        high = probes[reached][0] if reached.any() else high
+        low = probes[~reached][-1] if not reached.all() else low
+    return int(high)
+
+
+def tier_summary(groups, method=None, quantiles=QUANTILES):
+    mean, std = tier_moments(groups, method)
+    return dict(mean=mean, std=std,
+                **{f"p{round(q * 100)}": tier_quantile(groups, q, method) for q in quantiles})
+
+
+def _interpolated_cdf(groups, ns, method=None):
+    """``P(T ≤ ns)`` from ``CDF_POINTS`` exact values, interpolated in between.
+
+    The knots are spaced evenly in ``log n`` and the interpolation is cubic in
+    ``log(-log F)``: completion times are close to Gumbel, for which that is
+    linear in ``n``, and below the bulk ``F`` grows like a power of ``n``.
+    Across the game pools and ``--pool-size`` pools tried the error stays below 1e-8,
+    far below the mass of a codex bin.
+    """
+    keys = sum(groups[1])
+    ns = np.asarray(ns, dtype=np.int64)
+    out = np.zeros(ns.shape)
+    live = ns >= keys
+    x = np.log(ns[live])
+    knots = np.unique(np.rint(np.exp(np.linspace(x[0], x[-1], CDF_POINTS))).astype(np.int64))
+    exact = np.clip(tier_cdf(groups, knots, method), 1e-300, 1 - 2 ** -53)
+    gumbel = np.log(-np.log(exact))
+    nodes = np.log(knots)
+    j = np.clip(np.searchsorted(nodes, x, side='right') - 1, 1, len(knots) - 3)
+    # Lagrange weights on the knots j-1 .. j+2
+    stencil = [nodes[j + k] for k in range(-1, 3)]
+    fitted = 0.0
+    for k, node in enumerate(stencil):
+        weight = np.ones(x.shape)
+        for other in stencil[:k] + stencil[k + 1:]:
+            weight *= (x - other) / (node - other)
+        fitted = fitted + weight * gumbel[j + k - 1]
+    out[live] = np.exp(-np.exp(fitted))
+    return out
+
+
+@lru_cache(maxsize=None)
+def _tail_end(groups, tail=TAIL):
+    """Smallest ``n`` with ``P(T > n) ≤ tail`` by the union bound ``Σ_k (1 - r_k)^n``.
+
+    Right next to 1 the CDF is only good to its rounding noise, and the
+    ``1 - tail`` quantile would move with it; the bound has no cancellation
+    and is tight that far out.
+    """
+    rates, counts = map(np.array, groups)
+
+    def log_bound(n):
+        return np.logaddexp.reduce(np.log(counts) + n * np.log1p(-rates))
+
+    low, high = 0, 1
+    while log_bound(high) > math.log(tail):
+        low, high = high, high * 2
+    while high - low > 1:
+        mid = (low + high) // 2
+        low, high = (low, mid) if log_bound(mid) <= math.log(tail) else (mid, high)
+    return high
+
+
+@lru_cache(maxsize=None)
+def _binned(groups, width, method=None):
+    """Return ``(first, masses)``: ``masses[b]`` is ``P(first + b·width < T ≤ first + (b+1)·width)``."""
+    # P(T ≤ first) < TAIL, so the bins hold all but 2·TAIL of the mass
+    first = (tier_quantile(groups, TAIL, method) - 1) // width * width
+    edges = np.arange(first, _tail_end(groups) + 2 * width, width)
+    if len(edges) < 4 * CDF_POINTS:
+        return first, np.diff(tier_cdf(groups, edges, method))
+    return first, np.clip(np.diff(_interpolated_cdf(groups, edges, method)), 0.0, None)
+
+
+def codex_total(groups_list, method=None, quantiles=QUANTILES, bins=TOTAL_BINS):
+    """Distribution of the summed completion times of several pools.
+
+    Mean and std are exact; quantiles come from convolving the pool
+    distributions binned ``resolution`` encounters wide and are accurate to
+    about ``pools × resolution / 2``.
+    """
+    moments = [tier_moments(groups, method) for groups in groups_list]
+    spread = sum(_tail_end(groups) - tier_quantile(groups, TAIL, method)
+                 for groups in groups_list)
+    width = max(1, math.ceil(spread / bins))
+    origin = 0
+    total = None
+    for groups in groups_list:
+        first, masses = _binned(groups, width, method)
+        origin += first
+        total = masses if total is None else _convolve(total, masses)
+    cumulative = np.cumsum(total)
+    # a pool's time falls in (edge, edge + width]; take the middle of each bin
+    offset = origin + len(groups_list) * (width + 1) / 2
+    mean = sum(m for m, _ in moments)
+    std = math.sqrt(sum(s ** 2 for _, s in moments))
+    return dict(mean=mean, std=std, resolution=width,
+                **{f"p{round(q * 100)}": float(np.searchsorted(cumulative, q) * width + offset)
+                   for q in quantiles})
+
+
+def _convolve(a, b):
+    size = len(a) + len(b) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(a, fft_size) * np.fft.rfft(b, fft_size), fft_size)[:size]
+    return np.clip(out, 0.0, None)
+
+
+def scaled_pools(rules, size):
+    """Replace every pool with ``size`` creatures, catch rates cycled by index as in main.js."""
+    rates = [rate for pool in rules['pools'] for rate in pool.catch_rates][:10]
+    pools = []
+    for p, pool in enumerate(rules['pools']):
+        ids = tuple(f"{pool.biome}_{pool.phase}_{i:05d}" for i in range(size))
+        pools.append(Pool(pool.biome, pool.phase, ids,
+                          tuple(rates[(p * size + i) % len(rates)] for i in range(size))))
+    return dict(rules, pools=pools)
+
+
+def calculate(rules=None, tiers=VARIANTS, method=None, quantiles=QUANTILES):
+    rules = rules or load_rules()
+    started = time.perf_counter()
+    result = {'pools': {}, 'codex': {}}
+    for tier in tiers:
+        v = VARIANTS.index(tier)
+        groups_list = [rate_groups(key_rates(pool, rules)[:, v]) for pool in rules['pools']]
+        for pool, groups in zip(rules['pools'], groups_list):
+            result['pools'].setdefault(f"{pool.biome}_{pool.phase}", {})[tier] = \
+                tier_summary(groups, method, quantiles)
+        result['codex'][tier] = codex_total(groups_list, method, quantiles)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def print_result(result, quantiles=QUANTILES):
+    names = [f"p{round(q * 100)}" for q in quantiles]
+    header = f"{'mean':>12} {'std':>12} " + " ".join(f"{n:>10}" for n in names)
+    print(f"{'pool':<15} {'tier':<9} {header}")
+    for pool, tiers in result['pools'].items():
+        for tier, stats in tiers.items():
+            print(f"{pool:<15} {tier:<9} {stats['mean']:>12.2f} {stats['std']:>12.2f} "
+                  + " ".join(f"{stats[n]:>10}" for n in names))
+    print(f"\n{'codex':<15} {'tier':<9} {header} {'±':>6}")
+    for tier, stats in result['codex'].items():
+        print(f"{'all pools':<15} {tier:<9} {stats['mean']:>12.2f} {stats['std']:>12.2f} "
+              + " ".join(f"{stats[n]:>10.0f}" for n in names) + f" {stats['resolution']:>6}")
+    print(f"\nComputed in {result['seconds'] * 1000:.1f} ms")
+
+
+def check(players=20000, seed=0, sigmas=4.0):
+    """Cross-check both exact methods with each other and with the simulator.
+
+    Returns a list of failure descriptions.
+    """
+    rules = load_rules()
+    failures = []
+    for tier in VARIANTS:
+        v = VARIANTS.index(tier)
+        for pool in rules['pools'][:2]:
+            groups = rate_groups(key_rates(pool, rules)[:, v])
+            mean = tier_moments(groups, 'terms')[0]
+            ns = np.unique(np.linspace(len(pool.ids), 6 * mean, 400).astype(np.int64))
+            gap = np.abs(tier_cdf(groups, ns, 'terms') - tier_cdf(groups, ns, 'saddle')).max()
+            moments = [tier_moments(groups, m) for m in ('terms', 'saddle')]
+            drift = max(abs(a - b) / a for a, b in zip(*moments))
+            ok = gap < 1e-9 and drift < 1e-6
+            print(f"{pool.biome + '_' + pool.phase:<15} {tier:<9} max CDF gap {gap:.1e}, "
+                  f"moment drift {drift:.1e} {'ok' if ok else 'FAIL'}")
+            if not ok:
+                failures.append(f"{pool.biome}_{pool.phase} {tier}: methods disagree")
+    sim = simulate_batch(rules, np.random.SeedSequence(seed), players)
+    for index, pool in enumerate(rules['pools']):
+        for v, tier in enumerate(VARIANTS):
+            mean, std = tier_moments(rate_groups(key_rates(pool, rules)[:, v]))
+            sampled = sim['pool_sums'][index, v] / players
+            ok = abs(sampled - mean) <= sigmas * std / math.sqrt(players)
+            if not ok:
+                failures.append(f"{pool.biome}_{pool.phase} {tier}: simulated {sampled:.1f}, "
+                                f"exact {mean:.1f}")
+    print(f"simulated means of {len(rules['pools']) * len(VARIANTS)} pool tiers "
+          f"{'agree' if not failures else 'DISAGREE'} within {sigmas:g} standard errors")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exact codex completion-time distributions.")
+    parser.add_argument('--tiers', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--method', choices=('terms', 'saddle'),
+                        help=f"force inclusion–exclusion (pools of up to {MAX_TERM_KEYS} keys) "
+                             "or the saddle-point integral")
+    parser.add_argument('--pool-size', type=int, metavar='N',
+                        help="replace every pool with N creatures (catch rates cycled by index)")
+    parser.add_argument('--json', metavar='FILE', help="also write the result to FILE")
+    parser.add_argument('--check', action='store_true',
+                        help="cross-check the two methods and the Monte Carlo simulator")
+    args = parser.parse_args()
+    if args.check:
+        problems = check()
+        for problem in problems:
+            print(f"FAIL {problem}")
+        raise SystemExit(1 if problems else 0)
+    rules = load_rules()
+    if args.pool_size:
+        rules = scaled_pools(rules, args.pool_size)
+    try:
+        result = calculate(rules, tuple(args.tiers), args.method)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print_result(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=1)
+            fh.write("\n")
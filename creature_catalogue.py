@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Creature catalogue and display list compiler for the shiny hunting game.
+
+This is the pure data layer of the sprite pipeline: the ``CREATURES`` table,
+the asset paths and sprite size, and ``compile_creature``, which interprets a
+creature's params into an immutable display list of primitive draw ops. It
+imports only the standard library and touches no files, so tools that just
+need the roster can import it for next to nothing.
+
+Rasterising display lists, PNG encoding and writing files live in
+``generate_creatures.py``, which re-exports everything defined here.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+# Directory layout. Nothing here creates directories; writers do that
+# themselves when they first write.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, "assets", "creatures")
+BASE_OUTPUT = os.path.join(ASSETS_DIR, "base")
+UNIQUE_OUTPUT = os.path.join(ASSETS_DIR, "unique")
+
+SPRITE_SIZE = 100
+
+
+def sprite_seed(key, unique=False):
+    """Derive a stable RNG seed from a creature name (or params dict).
+
+    Python's built-in ``hash`` is salted per process, so the seed is taken from
+    a sha256 of the canonical JSON form instead.
+    """
+    payload = json.dumps([key, unique], sort_keys=True)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "big")
+
+
+def creature_features(params, unique=False):
+    """Resolve the effective drawing features of a creature.
+
+    Returns ``(colour, tail, horns, horns_colour, spines, crest, spots, fins)``
+    with defaults filled in and, for the unique form, the feature swaps and
+    colour shift applied.
+    """
+    # Extract parameters
+    colour = tuple(params.get('color', (120, 200, 120)))
+    tail_shape = params.get('tail', 'normal')
+    horns = params.get('horns', False)
+    horns_colour = params.get('horns_color', None)
+    spines = params.get('spines', 0)
+    crest = params.get('crest', False)
+    spots = params.get('spots', False)
+    fins = params.get('fins', False)
+
+    # For unique variants, adjust features to make them feel special
+    if unique:
+        # swap horns/spines/crest flags and adjust colours
+        colour = tuple(min(255, int(c * 0.7 + 80)) for c in colour)  # shift hue slightly
+        horns = not horns
+        spines = (spines + 2) % 5
+        crest = not crest if params.get('allow_crest_unique', True) else crest
+        spots = not spots
+        fins = not fins
+    return colour, tail_shape, horns, horns_colour, spines, crest, spots, fins
+
+
+class DrawOp(namedtuple('DrawOp', 'kind coords fill width')):
+    """One primitive of a compiled creature display list.
+
+    ``kind`` is ``'ellipse'``, ``'rectangle'``, ``'polygon'`` or ``'line'``;
+    ``coords`` is a flat tuple of integers in ``ImageDraw`` conventions (an
+    inclusive bounding box for ellipses and rectangles, ``x, y`` pairs for
+    polygons and lines); ``fill`` is an RGB tuple and ``width`` the line width
+    (``None`` for filled shapes).
+    """
+    __slots__ = ()
+
+
+def _flat(points):
+    return tuple(v for point in points for v in point)
+
+
+def _compile_display_list(params, unique, seed):
+    """Interpret the params of one creature into a tuple of ``DrawOp``."""
+    ops = []
+
+    def emit(kind, coords, fill, width=None):
+        ops.append(DrawOp(kind, _flat(coords) if kind in ('polygon', 'line') else tuple(coords),
+                          tuple(fill), width))
+
+    colour, tail_shape, horns, horns_colour, spines, crest, spots, fins = \
+        creature_features(params, unique)
+
+    # Body coordinates
+    body_rect = (20, 40, 80, 90)
+    # Draw body
+    emit('ellipse', body_rect, colour)
+
+    # Head
+    head_rect = (40, 20, 80, 60)
+    emit('ellipse', head_rect, colour)
+
+    # Legs
+    emit('rectangle', (30, 80, 40, 95), colour)
+    emit('rectangle', (55, 80, 65, 95), colour)
+
+    # Tail
+    if tail_shape == 'leaf':
+        leaf_points = [(20, 70), (10, 50), (20, 55), (15, 65)]
+        emit('polygon', leaf_points, colour)
+        # central vein on leaf
+        emit('line', [(15, 55), (15, 65)], (0, 100, 0), 1)
+    elif tail_shape == 'long':
+        tail_points = [(20, 75), (5, 65), (20, 55)]
+        emit('polygon', tail_points, colour)
+    elif tail_shape == 'fin':
+        tail_points = [(20, 70), (5, 60), (20, 50)]
+        emit('polygon', tail_points, colour)
+        emit('line', [(12, 58), (12, 65)], (0, 150, 200), 1)
+    else:  # normal
+        tail_points = [(20, 70), (10, 65), (20, 60)]
+        emit('polygon', tail_points, colour)
+
+    # Horns
+    if horns:
+        hc = horns_colour or tuple(min(255, c + 40) for c in colour)
+        emit('polygon', [(50, 12), (54, 25), (46, 25)], hc)
+        emit('polygon', [(60, 12), (64, 25), (56, 25)], hc)
+
+    # Spines along back
+    for i in range(spines):
+        x = 30 + i * 10
+        emit('polygon', [(x, 38 - i * 2), (x + 5, 28 - i * 2), (x + 10, 38 - i * 2)],
+             tuple(max(0, c - 30) for c in colour))
+
+    # Collar/crest of petals around neck
+    if crest:
+        for i in range(6):
+            angle = math.radians(i * 60)
+            cx, cy = 60, 40
+            dx = int(12 * math.cos(angle))
+            dy = int(12 * math.sin(angle))
+            petal_col = (255, 200, 0) if not unique else (255, 0, 200)
+            emit('ellipse', (cx + dx - 4, cy + dy - 4, cx + dx + 4, cy + dy + 4), petal_col)
+
+    # Spots
+    if spots:
+        rng = random.Random(sprite_seed(params if seed is None else seed, unique))
+        for _ in range(6):
+            sx = rng.randint(30, 70)
+            sy = rng.randint(50, 85)
+            spot_col = tuple(max(0, c - 40) for c in colour)
+            emit('ellipse', (sx - 2, sy - 2, sx + 2, sy + 2), spot_col)
+
+    # Fins along back (used for aquatic creatures)
+    if fins:
+        # draw three fins along spine
+        fin_col = tuple(min(255, c + 60) for c in colour)
+        for i in range(3):
+            fx = 35 + i * 15
+            emit('polygon', [(fx, 35 - i * 3), (fx + 7, 25 - i * 3), (fx + 14, 35 - i * 3)], fin_col)
+
+    # Eyes
+    eye_x, eye_y = 63, 33
+    # left eye
+    emit('ellipse', (eye_x - 10, eye_y - 5, eye_x - 4, eye_y + 1), (255, 255, 255))
+    emit('ellipse', (eye_x - 8, eye_y - 3, eye_x - 6, eye_y - 1), (0, 0, 0))
+    # right eye (smaller/side)
+    emit('ellipse', (eye_x - 24, eye_y - 5, eye_x - 18, eye_y + 1), (255, 255, 255))
+    emit('ellipse', (eye_x - 22, eye_y - 3, eye_x - 20, eye_y - 1), (0, 0, 0))
+
+    return tuple(ops)
+
+
+@lru_cache(maxsize=4096)
+def _compile_cached(params_key, unique, seed_key):
+    return _compile_display_list(json.loads(params_key), unique, json.loads(seed_key))
+
+
+def compile_creature(params, unique=False, seed=None):
+    """Compile a creature into an immutable display list of ``DrawOp``.
+
+    All of the param interpretation (feature swaps for the unique form, tail
+    kinds, seeded spot placement, derived colours) happens here, once; the
+    result is cached on the canonical JSON form of the inputs so repeat renders
+    at other scales or in other formats only replay the list.
+    """
+    return _compile_cached(json.dumps(params, sort_keys=True), unique,
+                           json.dumps(seed, sort_keys=True))
+
+
+def clear_compile_cache():
+    """Drop every cached display list, e.g. once a batch of one-off creatures is drawn."""
+    _compile_cached.cache_clear()
+
+
+# Feature stages of a display list, in the order ``_compile_display_list``
+# emits them; ``body`` covers the body, head and legs
+STAGES = ('body', 'tail', 'horns', 'spines', 'crest', 'spots', 'fins', 'eyes')
+
+
+def display_list_stages(params, unique=False):
+    """Return ``[(stage, op_count), ...]`` splitting a compiled display list
+    into the feature stages of ``STAGES``."""
+    colour, tail_shape, horns, horns_colour, spines, crest, spots, fins = \
+        creature_features(params, unique)
+    counts = {
+        'body': 4,
+        'tail': 2 if tail_shape in ('leaf', 'fin') else 1,
+        'horns': 2 if horns else 0,
+        'spines': spines,
+        'crest': 6 if crest else 0,
+        'spots': 6 if spots else 0,
+        'fins': 3 if fins else 0,
+        'eyes': 4,
+    }
+    return [(stage, counts[stage]) for stage in STAGES]
+
+
+def display_list_to_svg(ops):
+    """Return an SVG document for a display list, in sprite pixel units.
+
+    Ellipse and rectangle boxes are inclusive pixel ranges and polygon and line
+    points address pixel centres, as in ``ImageDraw``.
+    """
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{SPRITE_SIZE}" height="{SPRITE_SIZE}" '
+             f'viewBox="0 0 {SPRITE_SIZE} {SPRITE_SIZE}" shape-rendering="crispEdges">']
+    for kind, coords, fill, width in ops:
+        colour = '#%02x%02x%02x' % fill
+        if kind == 'ellipse':
+            x0, y0, x1, y1 = coords
+            parts.append(f'<ellipse cx="{(x0 + x1 + 1) / 2}" cy="{(y0 + y1 + 1) / 2}" '
+                         f'rx="{(x1 - x0 + 1) / 2}" ry="{(y1 - y0 + 1) / 2}" fill="{colour}"/>')
+        elif kind == 'rectangle':
+            x0, y0, x1, y1 = coords
+            parts.append(f'<rect x="{x0}" y="{y0}" width="{x1 - x0 + 1}" height="{y1 - y0 + 1}" '
+                         f'fill="{colour}"/>')
+        else:
+            points = ' '.join(f'{x + 0.5},{y + 0.5}' for x, y in zip(coords[::2], coords[1::2]))
+            if kind == 'polygon':
+                parts.append(f'<polygon points="{points}" fill="{colour}"/>')
+            else:
+                parts.append(f'<polyline points="{points}" fill="none" stroke="{colour}" '
+                             f'stroke-width="{width}"/>')
+    parts.append('</svg>')
+    return '\n'.join(parts) + '\n'
+
+
+def display_list_to_json(ops):
+    """Return a display list as plain lists, e.g. for replay on a browser canvas."""
+    return [[kind, list(coords), '#%02x%02x%02x' % fill, width] for kind, coords, fill, width in ops]
+
+
+# Define creature attributes per biome and time of day. Each entry defines the name
+# and drawing parameters for the base creature. Unique variants will be
+# automatically derived by the script.
+CREATURES = [
+    # Verdant Glade – Day
+    ('verdant_leaflon',    {'color': (76, 174, 79), 'tail': 'leaf', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('verdant_barkhorn',   {'color': (143, 92, 49), 'tail': 'normal', 'horns': True, 'horns_color': (189, 135, 70), 'spines': 0, 'crest': False, 'spots': False, 'fins': False}),
+    ('verdant_dewhopper', {'color': (119, 178, 187), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    ('verdant_suncollar', {'color': (208, 131, 45), 'tail': 'normal', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False, 'allow_crest_unique': False}),
+    ('verdant_sproutling',{'color': (102, 185, 90), 'tail': 'leaf', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    # Verdant Glade – Night
+    ('verdant_gloomdrake',{'color': (91, 64, 115), 'tail': 'long', 'horns': True, 'horns_color': (111, 84, 135), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('verdant_shadowpouncer',{'color': (60, 60, 70), 'tail': 'long', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('verdant_moonfen',   {'color': (75, 123, 199), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    ('verdant_shadehopper',{'color': (63, 97, 56), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': False}),
+    ('verdant_starbit',   {'color': (223, 210, 60), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': True}),
+    # Scorching Dunes – Day
+    ('desert_sunscale',   {'color': (230, 170, 69), 'tail': 'normal', 'horns': True, 'horns_color': (255, 213, 96), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_sandrunner', {'color': (199, 148, 80), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_cactusaur',  {'color': (187, 167, 57), 'tail': 'leaf', 'horns': True, 'horns_color': (204, 190, 92), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_mirageback',{'color': (207, 152, 97), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
+    ('desert_dustwing',  {'color': (215, 180, 100), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
+    # Scorching Dunes – Night
+    ('desert_dunehowl',  {'color': (120, 85, 60), 'tail': 'long', 'horns': True, 'horns_color': (145, 105, 75), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_nightcrawler',{'color': (85, 74, 65), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_mirageglider',{'color': (139, 116, 102), 'tail': 'fin', 'horns': True, 'horns_color': (169, 146, 132), 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
+    ('desert_sandshiver',{'color': (155, 121, 93), 'tail': 'long', 'horns': False, 'spines': 4, 'crest': False, 'spots': False, 'fins': False}),
+    ('desert_aridclaw', {'color': (133, 109, 90), 'tail': 'normal', 'horns': True, 'horns_color': (163, 139, 120), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    # Tidal Reef – Day
+    ('ocean_seapup',     {'color': (79, 169, 222), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
+    ('ocean_coralhorn', {'color': (85, 131, 191), 'tail': 'normal', 'horns': True, 'horns_color': (170, 198, 240), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('ocean_tideback',  {'color': (92, 183, 201), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
+    ('ocean_splashfin', {'color': (104, 167, 216), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': True}),
+    ('ocean_wavefoot',  {'color': (66, 138, 190), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    # Tidal Reef – Night
+    ('ocean_deepglow',  {'color': (40, 85, 138), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    ('ocean_moonray',   {'color': (58, 104, 161), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': True, 'fins': True}),
+    ('ocean_abyssclaw', {'color': (50, 84, 123), 'tail': 'normal', 'horns': True, 'horns_color': (80, 114, 153), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('ocean_mistwing',  {'color': (76, 121, 182), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
+    ('ocean_whirlpooler',{'color': (60, 94, 140), 'tail': 'fin', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': True}),
+    # Frost Peaks – Day
+    ('mountain_iceback',{'color': (146, 202, 221), 'tail': 'normal', 'horns': True, 'horns_color': (176, 232, 251), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_snowtail',{'color': (192, 223, 233), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_frosthorn',{'color': (163, 198, 222), 'tail': 'normal', 'horns': True, 'horns_color': (213, 243, 255), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_glacierpaw',{'color': (179, 210, 220), 'tail': 'normal', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
+    ('mountain_chilldrake',{'color': (134, 187, 210), 'tail': 'long', 'horns': True, 'horns_color': (164, 217, 240), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    # Frost Peaks – Night
+    ('mountain_iciclex',{'color': (103, 143, 170), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_nightfrost',{'color': (90, 122, 149), 'tail': 'long', 'horns': True, 'horns_color': (120, 152, 179), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_winterstalk',{'color': (113, 153, 180), 'tail': 'normal', 'horns': False, 'spines': 4, 'crest': False, 'spots': False, 'fins': False}),
+    ('mountain_snowmantle',{'color': (167, 214, 236), 'tail': 'normal', 'horns': False, 'spines': 1, 'crest': True, 'spots': False, 'fins': False}),
+    ('mountain_iceblink',{'color': (120, 164, 198), 'tail': 'fin', 'horns': True, 'horns_color': (150, 194, 228), 'spines': 2, 'crest': False, 'spots': False, 'fins': True}),
+    # Murk Swamp – Day
+    ('swamp_mudfin',    {'color': (102, 125, 77), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    ('swamp_bogmaw',    {'color': (89, 113, 65), 'tail': 'long', 'horns': True, 'horns_color': (119, 143, 95), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('swamp_marshclaw',{'color': (79, 103, 61), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
+    ('swamp_fenrunner',{'color': (96, 129, 82), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+    ('swamp_vinecrest',{'color': (83, 116, 70), 'tail': 'leaf', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
+    # Murk Swamp – Night
+    ('swamp_mireglow', {'color': (70, 96, 58), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
+    ('swamp_sludgeback',{'color': (60, 80, 50), 'tail': 'long', 'horns': True, 'horns_color': (90, 110, 70), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('swamp_fogwhisp',  {'color': (72, 98, 64), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': True, 'fins': True}),
+    ('swamp_croakshade',{'color': (68, 92, 58), 'tail': 'long', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
+    ('swamp_nightvine',{'color': (65, 90, 55), 'tail': 'leaf', 'horns': True, 'horns_color': (95, 120, 85), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
+]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Size-optimised, lossless PNG encoder for the creature sprites.
+
+Pillow's default PNG output stores every sprite as 8-bit RGBA, although each
+one only uses a handful of colours. ``encode_png`` instead:
+
+* converts the image to an indexed palette (with a ``tRNS`` chunk for alpha)
+  whenever it has at most 256 distinct RGBA colours, at the smallest bit depth
+  (1, 2, 4 or 8) that holds the palette;
+* applies each PNG row filter (None, Sub, Up, Average, Paeth) plus the usual
+  per-row minimum-sum adaptive choice, compresses each with several zlib
+  strategies, and keeps the smallest stream;
+* verifies that the result decodes to exactly the same pixels.
+
+Run as a script to re-encode every PNG under ``assets/creatures`` across a
+process pool, optionally writing lossless WebP siblings (``--webp``), and to
+print a before/after byte report for the tree.
+"""
+
+import argparse
+import glob
+import io
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CREATURE_ASSETS = os.path.join(BASE_DIR, "assets", "creatures")
+
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE, zlib.Z_HUFFMAN_ONLY)
+FILTERS = (0, 1, 2, 3, 4, 'adaptive')
+
+
+def _chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def _to_indexed(rgba):
+    """Return ``(palette, indices, bit_depth)`` or None if there are > 256 colours."""
+    flat = rgba.reshape(-1, 4)
+    packed = flat.view('<u4').ravel()
+    colours, indices = np.unique(packed, return_inverse=True)
+    if len(colours) > 256:
+        return None
+    palette = colours.view(np.uint8).reshape(-1, 4)
+    # Translucent entries first so the tRNS chunk can stop at the last of them
+    order = np.lexsort((colours, palette[:, 3] == 255))
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    bit_depth = next(d for d in (1, 2, 4, 8) if len(colours) <= 1 << d)
+    return palette[order], remap[indices].reshape(rgba.shape[:2]).astype(np.uint8), bit_depth
+
+
+def _pack_rows(indices, bit_depth):
+    """Pack palette indices into PNG scanline bytes at ``bit_depth``."""
+    if bit_depth == 8:
+        return indices
+    per_byte = 8 // bit_depth
+    h, w = indices.shape
+    padded = np.zeros((h, -(-w // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :w] = indices
+    groups = padded.reshape(h, -1, per_byte)
+    out = np.zeros(groups.shape[:2], dtype=np.uint8)
+    for k in range(per_byte):
+        out |= groups[:, :, k] << (8 - bit_depth * (k + 1))
+    return out
+
+
+def _filtered(rows, bpp):
+    """Return ``{filter_type: filtered scanlines}`` for the five PNG filters."""
+    x = rows.astype(np.int16)
+    a = np.zeros_like(x)
+    a[:, bpp:] = x[:, :-bpp]
+    b = np.zeros_like(x)
+    b[1:] = x[:-1]
+    c = np.zeros_like(x)
+    c[1:, bpp:] = x[:-1, :-bpp]
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    paeth = np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+    predictors = {0: 0, 1: a, 2: b, 3: (a + b) // 2, 4: paeth}
+    return {ftype: ((x - pred) & 0xFF).astype(np.uint8) for ftype, pred in predictors.items()}
+
+
+def _scanlines(filtered, choice):
+    """Prefix each row with its filter byte; ``choice`` is a type or per-row array."""
+    h = next(iter(filtered.values())).shape[0]
+    types = np.full(h, choice, dtype=np.uint8) if np.isscalar(choice) else choice
+    body = np.stack([filtered[t][i] for i, t in enumerate(types)])
+    return np.concatenate([types[:, None], body], axis=1).tobytes()
+
+
+def encode_png(img):
+    """Losslessly encode a PIL image as the smallest PNG found by the search."""
+    rgba = np.asarray(img.convert("RGBA"))
+    h, w = rgba.shape[:2]
+    indexed = _to_indexed(rgba)
+    if indexed is not None:
+        palette, indices, bit_depth = indexed
+        header = struct.pack(">IIBBBBB", w, h, bit_depth, 3, 0, 0, 0)
+        extra = _chunk(b"PLTE", palette[:, :3].tobytes())
+        alphas = palette[:, 3]
+        translucent = np.flatnonzero(alphas != 255)
+        if translucent.size:
+            extra += _chunk(b"tRNS", alphas[:translucent[-1] + 1].tobytes())
+        rows, bpp = _pack_rows(indices, bit_depth), 1
+    else:
+        header = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
+        extra = b""
+        rows, bpp = rgba.reshape(h, w * 4), 4
+
+    filtered = _filtered(rows, bpp)
+    # Minimum sum of absolute (signed) differences per row, the libpng heuristic
+    costs = np.stack([np.abs(filtered[t].astype(np.int8).astype(np.int32)).sum(axis=1)
+                      for t in range(5)])
+    best = None
+    for choice in FILTERS:
+        raw = _scanlines(filtered, costs.argmin(axis=0).astype(np.uint8)
+                         if choice == 'adaptive' else choice)
+        for strategy in ZLIB_STRATEGIES:
+            comp = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+            data = comp.compress(raw) + comp.flush()
+            if best is None or len(data) < len(best):
+                best = data
+
+    png = (b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", header) + extra
+           + _chunk(b"IDAT", best) + _chunk(b"IEND", b""))
+    with Image.open(io.BytesIO(png)) as check:
+        if not np.array_equal(np.asarray(check.convert("RGBA")), rgba):
+            raise ValueError("optimised PNG does not round-trip losslessly")
+    return png
+
+
+def encode_webp(img):
+    """Encode a PIL image as lossless WebP."""
+    buf = io.BytesIO()
+    img.convert("RGBA").save(buf, format="WEBP", lossless=True, quality=100, method=6, exact=True)
+    return buf.getvalue()
+
+
+def optimise_file(path, webp=False):
+    """Re-encode one PNG in place if that makes it smaller.
+
+    Returns ``(path, bytes_before, bytes_after, webp_bytes_or_None)``.
+    """
+    with open(path, "rb") as fh:
+        original = fh.read()
+    with Image.open(io.BytesIO(original)) as img:
+        img.load()
+        optimised = encode_png(img)
+        webp_size = None
+        if webp:
+            webp_data = encode_webp(img)
+            with open(os.path.splitext(path)[0] + ".webp", "wb") as fh:
+                fh.write(webp_data)
+            webp_size = len(webp_data)
+    if len(optimised) < len(original):
+        with open(path, "wb") as fh:
+            fh.write(optimised)
+        return path, len(original), len(optimised), webp_size
+    return path, len(original), len(original), webp_size
+
+
+def optimise_tree(root=CREATURE_ASSETS, jobs=1, webp=False):
+    """Optimise every PNG under ``root`` and print a per-folder byte report."""
+    started = time.perf_counter()
+    paths = sorted(glob.glob(os.path.join(root, "**", "*.png"), recursive=True))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(optimise_file, paths, [webp] * len(paths), chunksize=8))
+    else:
+        results = [optimise_file(path, webp) for path in paths]
+
+    totals = {}
+    for path, before, after, webp_size in results:
+        folder = os.path.relpath(os.path.dirname(path), root)
+        t = totals.setdefault(folder, [0, 0, 0, 0])
+        t[0] += 1
+        t[1] += before
+        t[2] += after
+        t[3] += webp_size or 0
+    print(f"{'folder':<12} {'files':>6} {'before':>10} {'after':>10} {'saved':>7}"
+          + (f" {'webp':>10}" if webp else ""))
+    for folder, (count, before, after, webp_bytes) in sorted(totals.items()) + [
+            ('TOTAL', [sum(t[i] for t in totals.values()) for i in range(4)])]:
+        saved = 100.0 * (before - after) / before if before else 0.0
+        print(f"{folder:<12} {count:>6} {before:>10} {after:>10} {saved:>6.1f}%"
+              + (f" {webp_bytes:>10}" if webp else ""))
+    print(f"Optimised {len(paths)} files in {time.perf_counter() - started:.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Losslessly shrink the creature PNGs.")
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help="worker processes (0 = one per CPU)")
+    parser.add_argument('--webp', action='store_true',
+                        help="also write lossless .webp siblings and report their size")
+    parser.add_argument('root', nargs='?', default=CREATURE_ASSETS,
+                        help="directory to optimise (default: assets/creatures)")
+    args = parser.parse_args()
+    optimise_tree(args.root, jobs=args.jobs or os.cpu_count() or 1, webp=args.webp)
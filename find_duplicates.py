@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Flag near-duplicate creature designs with perceptual hashes.
+
+Every base and unique sprite gets a 256-bit DCT perceptual hash: the sprite
+is composited onto black, reduced to 64×64 luminance ranks (see
+``luminance``), transformed with a 2-D DCT-II (one batched matrix product for
+all sprites), and the 16×16 lowest frequencies are thresholded at their
+median. All creatures share one body plan, so the usual 8×8 hash cannot tell
+a spine or a row of spots apart; at 16×16 recoloured copies of a design stay
+within a few bits while a single added feature moves ten or more. Colour
+itself is deliberately ignored: ocean_seapup, ocean_tideback and
+ocean_mistwing come out as one design.
+
+Pairs within ``--threshold`` bits are found with a multi-index hash table
+rather than by comparing every pair: the hash is cut into ``threshold + 1``
+disjoint bit ranges, one table per range, and by the pigeonhole principle any
+two hashes within the threshold agree exactly on at least one range. Only
+sprites sharing a bucket are compared, and identical hashes are collapsed
+first so that families of exact copies do not blow up the buckets. Matching
+pairs are merged into clusters with a union-find.
+
+Sprites come from the roster (the default), from ``--species N`` procedural
+species per biome and phase drawn in memory with the rules of
+``generate_species.py``, or from the ``base``/``unique`` PNGs under
+``--folder``. ``--gate`` exits with status 1 when any cluster is found, for use
+as a build step.
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+from PIL import Image
+
+from generate_creatures import CREATURES, draw_creature
+
+HASH_SIZE = 16
+SAMPLE_SIZE = 64
+DEFAULT_THRESHOLD = 8
+# ITU-R BT.601 luma weights, as Pillow's "L" conversion
+LUMA = np.array([0.299, 0.587, 0.114])
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis as an ``n × n`` matrix."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    basis = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+DCT = _dct_matrix(SAMPLE_SIZE)[:HASH_SIZE]
+
+
+def luminance(img):
+    """Composite an RGBA sprite onto black and return its ``SAMPLE_SIZE``² luma ranks.
+
+    Each pixel is replaced by the rank of its (rounded) luma among the
+    sprite's distinct levels, scaled to 0–1. Body, fins, spots and eyes keep
+    their order from dark to light whatever the body colour, so a recoloured
+    copy of a design hashes like the original.
+    """
+    small = img.convert("RGBA").resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX)
+    rgba = np.asarray(small, dtype=np.float64)
+    luma = np.rint((rgba[..., :3] @ LUMA) * (rgba[..., 3] / 255.0)).astype(np.intp)
+    present = np.bincount(luma.ravel(), minlength=256) > 0
+    ranks = np.cumsum(present) - 1
+    return ranks[luma] / max(1, ranks[-1])
+
+
+def phash_batch(samples):
+    """Return the perceptual hashes of a ``[N, SAMPLE_SIZE, SAMPLE_SIZE]`` stack as ints."""
+    coeffs = (DCT @ samples @ DCT.T).reshape(len(samples), -1)
+    # the DC term only measures overall brightness, keep it out of the median
+    medians = np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    bits = np.packbits(coeffs > medians, axis=1)
+    return [int.from_bytes(row.tobytes(), 'big') for row in bits]
+
+
+def roster_sprites():
+    """Yield ``(key, image)`` for both forms of every roster creature."""
+    for name, params in CREATURES:
+        for unique in (False, True):
+            yield f"{name}_{'unique' if unique else 'base'}", \
+                draw_creature(params, unique=unique, seed=name)
+
+
+def species_sprites(per_group, seed=0):
+    """Yield ``(key, image)`` for both forms of procedural species, drawn in memory."""
+    from generate_species import iter_species, roster_rules, species_name, species_params
+    rules = roster_rules()
+    for biome, phase, index in iter_species(per_group, tuple(rules)):
+        name = species_name(biome, phase, index)
+        params = species_params(rules, biome, phase, index, seed)
+        for unique in (False, True):
+            yield f"{name}_{'unique' if unique else 'base'}", \
+                draw_creature(params, unique=unique, seed=name)
+
+
+def folder_sprites(root):
+    """Yield ``(key, image)`` for the PNGs in ``root/base`` and ``root/unique``."""
+    for form in ("base", "unique"):
+        folder = os.path.join(root, form)
+        if not os.path.isdir(folder):
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".png"):
+                with Image.open(os.path.join(folder, filename)) as img:
+                    yield filename[:-4], img.copy()
+
+
+def hash_sprites(sprites, batch=1024):
+    """Return ``{key: hash}``; images are reduced as they arrive and hashed in batches."""
+    hashes = {}
+    keys, samples = [], []
+    for key, img in sprites:
+        keys.append(key)
+        samples.append(luminance(img))
+        if len(keys) == batch:
+            hashes.update(zip(keys, phash_batch(np.stack(samples))))
+            keys, samples = [], []
+    if keys:
+        hashes.update(zip(keys, phash_batch(np.stack(samples))))
+    return hashes
+
+
+class MultiIndexHash:
+    """Multi-index hash table answering Hamming range queries on ``bits``-bit hashes."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, bits=HASH_SIZE * HASH_SIZE):
+        self.threshold = threshold
+        parts = threshold + 1
+        edges = [bits * i // parts for i in range(parts + 1)]
+        self.ranges = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self.tables = [defaultdict(list) for _ in self.ranges]
+        self.values = []
+
+    def add(self, value):
+        """Index ``value`` and return its id."""
+        ident = len(self.values)
+        self.values.append(value)
+        for table, (shift, mask) in zip(self.tables, self.ranges):
+            table[(value >> shift) & mask].append(ident)
+        return ident
+
+    def near(self, value):
+        """Return ``[(id, distance), ...]`` of indexed values within the threshold."""
+        seen = set()
+        out = []
+        for table, (shift, mask) in zip(self.tables, self.ranges):
+            for ident in table.get((value >> shift) & mask, ()):
+                if ident in seen:
+                    continue
+                seen.add(ident)
+                distance = (self.values[ident] ^ value).bit_count()
+                if distance <= self.threshold:
+                    out.append((ident, distance))
+        return out
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_clusters(hashes, threshold=DEFAULT_THRESHOLD):
+    """Group sprite keys whose hashes are within ``threshold`` bits.
+
+    Returns a list of clusters, largest first, each ``{'members': [...],
+    'max_distance': d}`` where ``d`` is the largest distance of a merging pair.
+    """
+    by_hash = defaultdict(list)
+    for key, value in hashes.items():
+        by_hash[value].append(key)
+    distinct = list(by_hash)
+    parent = list(range(len(distinct)))
+    widest = [0] * len(distinct)
+    index = MultiIndexHash(threshold)
+    for value in distinct:
+        ident = index.add(value)
+        for other, distance in index.near(value):
+            if other == ident:
+                continue
+            a, b = _find(parent, ident), _find(parent, other)
+            if a != b:
+                parent[a] = b
+                widest[b] = max(widest[a], widest[b])
+            widest[b] = max(widest[b], distance)
+    groups = defaultdict(list)
+    for ident, value in enumerate(distinct):
+        groups[_find(parent, ident)].extend(by_hash[value])
+    clusters = [{'members': sorted(members), 'max_distance': widest[root]}
+                for root, members in groups.items() if len(members) > 1]
+    return sorted(clusters, key=lambda c: (-len(c['members']), c['members'][0]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Report near-duplicate creature sprites.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--species', type=int, metavar='N',
+                        help="check N procedural species per biome and phase instead of the roster")
+    source.add_argument('--folder', help="check the base/unique PNGs under this folder")
+    parser.add_argument('--seed', type=int, default=0, help="procedural species seed")
+    parser.add_argument('--threshold', '-t', type=int, default=DEFAULT_THRESHOLD,
+                        help="Hamming distance in bits at or below which sprites count as duplicates")
+    parser.add_argument('--json', action='store_true', help="print the clusters as JSON")
+    parser.add_argument('--gate', action='store_true', help="exit with status 1 if any cluster is found")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.species:
+        sprites = species_sprites(args.species, args.seed)
+    elif args.folder:
+        sprites = folder_sprites(args.folder)
+    else:
+        sprites = roster_sprites()
+    hashes = hash_sprites(sprites)
+    hashed = time.perf_counter()
+    clusters = find_clusters(hashes, args.threshold)
+    done = time.perf_counter()
+    if args.json:
+        print(json.dumps(clusters, indent=1))
+    else:
+        for cluster in clusters:
+            print(f"{len(cluster['members']):>4} sprites, distance <= {cluster['max_distance']}: "
+                  + ", ".join(cluster['members']))
+        print(f"{len(hashes)} sprites, {len(clusters)} cluster(s) within {args.threshold} bits; "
+              f"hashed in {hashed - started:.2f}s, indexed in {(done - hashed) * 1000:.1f} ms")
+    raise SystemExit(1 if args.gate and clusters else 0)
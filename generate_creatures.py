@@ -12,216 +12,675 @@ directories:
 ``assets/creatures/base``     – base form for each creature (standard and radiant variants share this art)
 ``assets/creatures/unique``   – unique form for each creature (used for the unique variant)
 
-Radiant variants are produced at runtime by applying a simple hue shift in
-JavaScript, so only the base and unique images need to be pre‑generated here.
+Radiant variants and the silhouettes shown for uncaught codex entries are
+baked from the base images (see ``bake_variants.py``) into
+``assets/creatures/radiant`` and ``assets/creatures/silhouette`` at the end of
+every run, for each sprite that was redrawn or whose variants are missing.
 
-Running this script will overwrite any existing images in those folders.
+Running this script will overwrite any existing images in those folders. Pass
+``--jobs N`` to render and encode the sprites across ``N`` worker processes,
+and ``--incremental`` to only rebuild sprites whose params, drawing code or
+output settings changed since the last run (tracked in
+``assets/creatures/build_manifest.json``). Files whose bytes are unchanged are
+never rewritten, so their modification times stay stable.
+
+Rendering is deterministic: spot placement is seeded from each creature's
+name. ``--verify-golden`` renders every sprite in memory and checks its pixel
+hash against ``golden_hashes.json``; run it on every commit, and use
+``--update-golden`` after an intentional change to the artwork.
+
+Sprites are written through the lossless size-optimised PNG encoder in
+``encode_sprites.py`` (indexed palette plus a filter/zlib strategy search);
+``--png-encoder pillow`` switches to Pillow's plain encoder.
+
+Each sprite is first compiled into an immutable display list of primitive
+draw ops (``compile_creature``) which is cached and then replayed by a backend:
+Pillow (``replay_pillow``, optionally scaled), SVG (``display_list_to_svg``) or
+JSON for a browser canvas (``--export-display-lists FILE``).
+
+The creature table and the display list compiler live in the pure data
+module ``creature_catalogue.py`` (re-exported here). This module imports
+Pillow, NumPy and the process pool lazily, on first draw or encode, and creates
+the output folders only when it writes; ``--check-import-time`` checks both
+modules' cold import times against ``IMPORT_BUDGETS`` with ``-X importtime``.
+
+``--profile [FILE]`` times every creature's drawing stages (body, tail, horns,
+spines, crest, spots, fins, eyes), PNG encodes and file writes, writes them as
+a Chrome trace (``profile_trace.json`` by default) and prints an aggregate
+table; ``--cprofile FILE`` additionally dumps ``cProfile`` stats for the run.
+Without these flags the plain drawing path runs untouched.
+
+After regenerating, run ``pack_atlas.py`` to rebuild the sprite atlas that the
+game loads instead of the individual PNGs.
 """
 
+import argparse
+import cProfile
+import hashlib
+import importlib
+import inspect
+import io
+import json
 import os
-import math
-from PIL import Image, ImageDraw, ImageFilter
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+from creature_catalogue import (ASSETS_DIR, BASE_DIR, BASE_OUTPUT, CREATURES, SPRITE_SIZE, STAGES,
+                                UNIQUE_OUTPUT, DrawOp, _compile_display_list, clear_compile_cache,
+                                compile_creature, creature_features, display_list_stages, display_list_to_json,
+                                display_list_to_svg, sprite_seed)
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Pillow, NumPy (via encode_sprites and bake_variants) and the process pool are
+# only imported once something is actually drawn, encoded or spread across workers
+Image = _LazyModule("PIL.Image")
+ImageDraw = _LazyModule("PIL.ImageDraw")
+encode_sprites = _LazyModule("encode_sprites")
+futures = _LazyModule("concurrent.futures")
+bake_variants = _LazyModule("bake_variants")
+
+# Build manifest used by incremental runs to skip sprites that are up to date
+MANIFEST_PATH = os.path.join(ASSETS_DIR, "build_manifest.json")
+
+# Output settings. Anything that changes the bytes written for a given set of
+# params belongs here (or is ``SPRITE_SIZE``) so that it is folded into the
+# incremental build hash.
+PNG_SAVE_OPTIONS = {}
+# 'optimised' runs the lossless palette/filter search in encode_sprites.py,
+# 'pillow' is Pillow's plain RGBA encoder (faster, for quick iteration)
+PNG_ENCODER = 'optimised'
+# Cold import budgets in seconds for ``--check-import-time`` (about twice the
+# measured 25-30 ms and 55-60 ms, so they catch Pillow or NumPy creeping back in
+# rather than machine noise), and modules the data layer must never pull in
+IMPORT_BUDGETS = {'creature_catalogue': 0.050, 'generate_creatures': 0.100}
+HEAVY_MODULES = ('PIL', 'numpy', 'concurrent.futures.process')
+# Checked-in table of expected pixel hashes, see ``verify_golden``
+GOLDEN_PATH = os.path.join(BASE_DIR, "golden_hashes.json")
+PROFILE_PATH = os.path.join(BASE_DIR, "profile_trace.json")
+
+
+def _draw_op(draw, kind, coords, fill, width):
+    if kind == 'ellipse':
+        draw.ellipse(coords, fill=fill)
+    elif kind == 'rectangle':
+        draw.rectangle(coords, fill=fill)
+    elif kind == 'polygon':
+        draw.polygon(coords, fill=fill)
+    else:
+        draw.line(coords, fill=fill, width=width)
+
+
+def replay_pillow(ops, scale=1):
+    """Replay a display list onto a new RGBA image, optionally scaled up."""
+    size = SPRITE_SIZE * scale
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for kind, coords, fill, width in ops:
+        if scale != 1:
+            if kind in ('ellipse', 'rectangle'):
+                # inclusive boxes grow to cover the whole scaled pixel block
+                x0, y0, x1, y1 = coords
+                coords = (x0 * scale, y0 * scale, x1 * scale + scale - 1, y1 * scale + scale - 1)
+            else:
+                coords = tuple(v * scale + scale // 2 for v in coords)
+            width = width and width * scale
+        _draw_op(draw, kind, coords, fill, width)
+    return img
+
+
+class LayerCache:
+    """Bounded LRU cache of prerendered alpha coverage masks for draw ops.
+
+    Masks are keyed on geometry only, never colour, so the body, head, legs
+    and eyes that every creature shares, and each tail, horn, spine, petal and
+    fin stamp, are rasterised once and then reused in any tint. Consecutive
+    ops with the same fill are merged into a single layer, so the body
+    silhouette, a spine row or a petal ring costs one composite. Each entry is
+    the mask cropped to its bounding box.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._masks = OrderedDict()
 
-# Directory setup
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(BASE_DIR, "assets", "creatures")
-BASE_OUTPUT = os.path.join(ASSETS_DIR, "base")
-UNIQUE_OUTPUT = os.path.join(ASSETS_DIR, "unique")
-os.makedirs(BASE_OUTPUT, exist_ok=True)
-os.makedirs(UNIQUE_OUTPUT, exist_ok=True)
+    def mask(self, ops):
+        """Return ``(bbox, mask)`` covering a run of ops, or None if it is empty."""
+        key = tuple((op.kind, op.coords, op.width) for op in ops)
+        try:
+            entry = self._masks[key]
+        except KeyError:
+            self.misses += 1
+            img = Image.new("L", (SPRITE_SIZE, SPRITE_SIZE), 0)
+            draw = ImageDraw.Draw(img)
+            for op in ops:
+                _draw_op(draw, op.kind, op.coords, 255, op.width)
+            bbox = img.getbbox()
+            entry = (bbox, img.crop(bbox)) if bbox else None
+            self._masks[key] = entry
+            if len(self._masks) > self.maxsize:
+                self._masks.popitem(last=False)
+            return entry
+        self.hits += 1
+        self._masks.move_to_end(key)
+        return entry
 
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._masks),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
 
-def draw_creature(params, unique=False):
+
+LAYER_CACHE = LayerCache()
+
+
+def replay_layers(ops, cache=LAYER_CACHE):
+    """Replay a display list by tinting and compositing cached coverage masks.
+
+    Produces the same pixels as ``replay_pillow`` at scale 1.
+    """
+    img = Image.new("RGBA", (SPRITE_SIZE, SPRITE_SIZE), (0, 0, 0, 0))
+    start = 0
+    for end in range(1, len(ops) + 1):
+        if end < len(ops) and ops[end].fill == ops[start].fill:
+            continue
+        entry = cache.mask(ops[start:end])
+        if entry is not None:
+            bbox, mask = entry
+            img.paste(ops[start].fill + (255,), bbox, mask)
+        start = end
+    return img
+
+
+RENDERERS = {'pillow': replay_pillow, 'layers': replay_layers}
+
+
+def draw_creature(params, unique=False, seed=None, renderer='pillow'):
     """Draw a single creature sprite based on parameter dictionary.
 
     When ``unique`` is True the creature is drawn with modified features and
     colours to serve as the "unique" variant. Otherwise the base variant is
     rendered.
+
+    Spot placement is driven by a private RNG seeded from ``seed`` (normally
+    the creature name) or, when no seed is given, from the params themselves,
+    so the same inputs always produce the same pixels.
+
+    The creature is compiled to a cached display list (``compile_creature``)
+    and replayed by ``renderer``: ``'pillow'`` draws each op with ``ImageDraw``,
+    ``'layers'`` composites tinted masks from ``LAYER_CACHE``.
     """
-    # Base image size
-    size = 100
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    return RENDERERS[renderer](compile_creature(params, unique, seed))
+
+
+def encode_sprite_png(img, encoder=PNG_ENCODER):
+    """Encode a sprite as PNG bytes with the named encoder."""
+    if encoder == 'optimised':
+        return encode_sprites.encode_png(img)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", **PNG_SAVE_OPTIONS)
+    return buf.getvalue()
+
 
-    # Extract parameters
-    colour = params.get('color', (120, 200, 120))
-    tail_shape = params.get('tail', 'normal')
-    horns = params.get('horns', False)
-    horns_colour = params.get('horns_color', None)
-    spines = params.get('spines', 0)
-    crest = params.get('crest', False)
-    spots = params.get('spots', False)
-    fins = params.get('fins', False)
-
-    # For unique variants, adjust features to make them feel special
-    if unique:
-        # swap horns/spines/crest flags and adjust colours
-        colour = tuple(min(255, int(c * 0.7 + 80)) for c in colour)  # shift hue slightly
-        horns = not horns
-        spines = (spines + 2) % 5
-        crest = not crest if params.get('allow_crest_unique', True) else crest
-        spots = not spots
-        fins = not fins
-
-    # Body coordinates
-    body_rect = (20, 40, 80, 90)
-    # Draw body
-    draw.ellipse(body_rect, fill=colour)
-
-    # Head
-    head_rect = (40, 20, 80, 60)
-    draw.ellipse(head_rect, fill=colour)
-
-    # Legs
-    draw.rectangle((30, 80, 40, 95), fill=colour)
-    draw.rectangle((55, 80, 65, 95), fill=colour)
-
-    # Tail
-    if tail_shape == 'leaf':
-        leaf_points = [(20, 70), (10, 50), (20, 55), (15, 65)]
-        draw.polygon(leaf_points, fill=colour)
-        # central vein on leaf
-        draw.line([(15, 55), (15, 65)], fill=(0, 100, 0), width=1)
-    elif tail_shape == 'long':
-        tail_points = [(20, 75), (5, 65), (20, 55)]
-        draw.polygon(tail_points, fill=colour)
-    elif tail_shape == 'fin':
-        tail_points = [(20, 70), (5, 60), (20, 50)]
-        draw.polygon(tail_points, fill=colour)
-        draw.line([(12, 58), (12, 65)], fill=(0, 150, 200), width=1)
-    else:  # normal
-        tail_points = [(20, 70), (10, 65), (20, 60)]
-        draw.polygon(tail_points, fill=colour)
-
-    # Horns
-    if horns:
-        hc = horns_colour or tuple(min(255, c + 40) for c in colour)
-        draw.polygon([(50, 12), (54, 25), (46, 25)], fill=hc)
-        draw.polygon([(60, 12), (64, 25), (56, 25)], fill=hc)
-
-    # Spines along back
-    for i in range(spines):
-        x = 30 + i * 10
-        draw.polygon([(x, 38 - i * 2), (x + 5, 28 - i * 2), (x + 10, 38 - i * 2)],
-                     fill=tuple(max(0, c - 30) for c in colour))
-
-    # Collar/crest of petals around neck
-    if crest:
-        for i in range(6):
-            angle = math.radians(i * 60)
-            cx, cy = 60, 40
-            dx = int(12 * math.cos(angle))
-            dy = int(12 * math.sin(angle))
-            petal_col = (255, 200, 0) if not unique else (255, 0, 200)
-            draw.ellipse((cx + dx - 4, cy + dy - 4, cx + dx + 4, cy + dy + 4), fill=petal_col)
-
-    # Spots
-    if spots:
-        import random
-        for _ in range(6):
-            sx = random.randint(30, 70)
-            sy = random.randint(50, 85)
-            spot_col = tuple(max(0, c - 40) for c in colour)
-            draw.ellipse((sx - 2, sy - 2, sx + 2, sy + 2), fill=spot_col)
-
-    # Fins along back (used for aquatic creatures)
-    if fins:
-        # draw three fins along spine
-        fin_col = tuple(min(255, c + 60) for c in colour)
-        for i in range(3):
-            fx = 35 + i * 15
-            draw.polygon([(fx, 35 - i * 3), (fx + 7, 25 - i * 3), (fx + 14, 35 - i * 3)], fill=fin_col)
-
-    # Eyes
-    eye_x, eye_y = 63, 33
-    # left eye
-    draw.ellipse((eye_x - 10, eye_y - 5, eye_x - 4, eye_y + 1), fill=(255, 255, 255))
-    draw.ellipse((eye_x - 8, eye_y - 3, eye_x - 6, eye_y - 1), fill=(0, 0, 0))
-    # right eye (smaller/side)
-    draw.ellipse((eye_x - 24, eye_y - 5, eye_x - 18, eye_y + 1), fill=(255, 255, 255))
-    draw.ellipse((eye_x - 22, eye_y - 3, eye_x - 20, eye_y - 1), fill=(0, 0, 0))
+def draw_creature_profiled(params, unique, seed, renderer, events, form):
+    """``draw_creature`` that appends ``(stage, form, start, end)`` timings.
 
+    The display list is replayed stage by stage (see ``display_list_stages``)
+    with the same ``ImageDraw`` calls as ``replay_pillow``, so the pixels are
+    identical; the ``layers`` renderer is timed as a single ``replay`` stage.
+    """
+    clock = time.perf_counter
+    t0 = clock()
+    ops = compile_creature(params, unique, seed)
+    events.append(('compile', form, t0, clock()))
+    if renderer != 'pillow':
+        t0 = clock()
+        img = RENDERERS[renderer](ops)
+        events.append(('replay', form, t0, clock()))
+        return img
+    img = Image.new("RGBA", (SPRITE_SIZE, SPRITE_SIZE), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    start = 0
+    for stage, count in display_list_stages(params, unique):
+        t0 = clock()
+        for kind, coords, fill, width in ops[start:start + count]:
+            _draw_op(draw, kind, coords, fill, width)
+        events.append((stage, form, t0, clock()))
+        start += count
+    assert start == len(ops), "display_list_stages is out of step with the compiler"
     return img
 
 
-# Define creature attributes per biome and time of day. Each entry defines the name
-# and drawing parameters for the base creature. Unique variants will be
-# automatically derived by the script.
-CREATURES = [
-    # Verdant Glade – Day
-    ('verdant_leaflon',    {'color': (76, 174, 79), 'tail': 'leaf', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('verdant_barkhorn',   {'color': (143, 92, 49), 'tail': 'normal', 'horns': True, 'horns_color': (189, 135, 70), 'spines': 0, 'crest': False, 'spots': False, 'fins': False}),
-    ('verdant_dewhopper', {'color': (119, 178, 187), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    ('verdant_suncollar', {'color': (208, 131, 45), 'tail': 'normal', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False, 'allow_crest_unique': False}),
-    ('verdant_sproutling',{'color': (102, 185, 90), 'tail': 'leaf', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    # Verdant Glade – Night
-    ('verdant_gloomdrake',{'color': (91, 64, 115), 'tail': 'long', 'horns': True, 'horns_color': (111, 84, 135), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('verdant_shadowpouncer',{'color': (60, 60, 70), 'tail': 'long', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('verdant_moonfen',   {'color': (75, 123, 199), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    ('verdant_shadehopper',{'color': (63, 97, 56), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': False}),
-    ('verdant_starbit',   {'color': (223, 210, 60), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': True}),
-    # Scorching Dunes – Day
-    ('desert_sunscale',   {'color': (230, 170, 69), 'tail': 'normal', 'horns': True, 'horns_color': (255, 213, 96), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_sandrunner', {'color': (199, 148, 80), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_cactusaur',  {'color': (187, 167, 57), 'tail': 'leaf', 'horns': True, 'horns_color': (204, 190, 92), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_mirageback',{'color': (207, 152, 97), 'tail': 'long', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
-    ('desert_dustwing',  {'color': (215, 180, 100), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
-    # Scorching Dunes – Night
-    ('desert_dunehowl',  {'color': (120, 85, 60), 'tail': 'long', 'horns': True, 'horns_color': (145, 105, 75), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_nightcrawler',{'color': (85, 74, 65), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_mirageglider',{'color': (139, 116, 102), 'tail': 'fin', 'horns': True, 'horns_color': (169, 146, 132), 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
-    ('desert_sandshiver',{'color': (155, 121, 93), 'tail': 'long', 'horns': False, 'spines': 4, 'crest': False, 'spots': False, 'fins': False}),
-    ('desert_aridclaw', {'color': (133, 109, 90), 'tail': 'normal', 'horns': True, 'horns_color': (163, 139, 120), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    # Tidal Reef – Day
-    ('ocean_seapup',     {'color': (79, 169, 222), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
-    ('ocean_coralhorn', {'color': (85, 131, 191), 'tail': 'normal', 'horns': True, 'horns_color': (170, 198, 240), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('ocean_tideback',  {'color': (92, 183, 201), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
-    ('ocean_splashfin', {'color': (104, 167, 216), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': True}),
-    ('ocean_wavefoot',  {'color': (66, 138, 190), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    # Tidal Reef – Night
-    ('ocean_deepglow',  {'color': (40, 85, 138), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    ('ocean_moonray',   {'color': (58, 104, 161), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': True, 'fins': True}),
-    ('ocean_abyssclaw', {'color': (50, 84, 123), 'tail': 'normal', 'horns': True, 'horns_color': (80, 114, 153), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('ocean_mistwing',  {'color': (76, 121, 182), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': False, 'fins': True}),
-    ('ocean_whirlpooler',{'color': (60, 94, 140), 'tail': 'fin', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': True}),
-    # Frost Peaks – Day
-    ('mountain_iceback',{'color': (146, 202, 221), 'tail': 'normal', 'horns': True, 'horns_color': (176, 232, 251), 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_snowtail',{'color': (192, 223, 233), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_frosthorn',{'color': (163, 198, 222), 'tail': 'normal', 'horns': True, 'horns_color': (213, 243, 255), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_glacierpaw',{'color': (179, 210, 220), 'tail': 'normal', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
-    ('mountain_chilldrake',{'color': (134, 187, 210), 'tail': 'long', 'horns': True, 'horns_color': (164, 217, 240), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    # Frost Peaks – Night
-    ('mountain_iciclex',{'color': (103, 143, 170), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_nightfrost',{'color': (90, 122, 149), 'tail': 'long', 'horns': True, 'horns_color': (120, 152, 179), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_winterstalk',{'color': (113, 153, 180), 'tail': 'normal', 'horns': False, 'spines': 4, 'crest': False, 'spots': False, 'fins': False}),
-    ('mountain_snowmantle',{'color': (167, 214, 236), 'tail': 'normal', 'horns': False, 'spines': 1, 'crest': True, 'spots': False, 'fins': False}),
-    ('mountain_iceblink',{'color': (120, 164, 198), 'tail': 'fin', 'horns': True, 'horns_color': (150, 194, 228), 'spines': 2, 'crest': False, 'spots': False, 'fins': True}),
-    # Murk Swamp – Day
-    ('swamp_mudfin',    {'color': (102, 125, 77), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    ('swamp_bogmaw',    {'color': (89, 113, 65), 'tail': 'long', 'horns': True, 'horns_color': (119, 143, 95), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('swamp_marshclaw',{'color': (79, 103, 61), 'tail': 'long', 'horns': False, 'spines': 3, 'crest': False, 'spots': False, 'fins': False}),
-    ('swamp_fenrunner',{'color': (96, 129, 82), 'tail': 'long', 'horns': False, 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-    ('swamp_vinecrest',{'color': (83, 116, 70), 'tail': 'leaf', 'horns': False, 'spines': 0, 'crest': True, 'spots': False, 'fins': False}),
-    # Murk Swamp – Night
-    ('swamp_mireglow', {'color': (70, 96, 58), 'tail': 'fin', 'horns': False, 'spines': 0, 'crest': False, 'spots': True, 'fins': True}),
-    ('swamp_sludgeback',{'color': (60, 80, 50), 'tail': 'long', 'horns': True, 'horns_color': (90, 110, 70), 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('swamp_fogwhisp',  {'color': (72, 98, 64), 'tail': 'fin', 'horns': False, 'spines': 1, 'crest': False, 'spots': True, 'fins': True}),
-    ('swamp_croakshade',{'color': (68, 92, 58), 'tail': 'long', 'horns': False, 'spines': 2, 'crest': False, 'spots': False, 'fins': False}),
-    ('swamp_nightvine',{'color': (65, 90, 55), 'tail': 'leaf', 'horns': True, 'horns_color': (95, 120, 85), 'spines': 1, 'crest': False, 'spots': False, 'fins': False}),
-]
-
-
-def generate_all():
-    """Generate base and unique sprites for all defined creatures."""
+def render_creature_png(name, params, renderer='pillow', encoder=PNG_ENCODER, profile=False):
+    """Render the base and unique forms of one creature as encoded PNG bytes.
+
+    This is the unit of work handed to pool workers. Encoded bytes are far
+    cheaper to send back to the parent than pickled PIL images, so the parent
+    only ever writes files. Returns ``(name, base_png, unique_png, pid,
+    seconds, layer_cache_stats, events)``; ``layer_cache_stats`` is this
+    process's ``LAYER_CACHE.stats()`` so the parent can report hit rates per
+    worker, and ``events`` holds the ``(stage, form, start, end)`` timings of
+    a ``profile`` run (None otherwise).
+    """
+    start = time.perf_counter()
+    encoded = []
+    events = None
+    if profile:
+        events = []
+        for form in ('base', 'unique'):
+            img = draw_creature_profiled(params, form == 'unique', name, renderer, events, form)
+            t0 = time.perf_counter()
+            encoded.append(encode_sprite_png(img, encoder))
+            events.append(('encode', form, t0, time.perf_counter()))
+        events.append(('creature', '', start, time.perf_counter()))
+    else:
+        for unique in (False, True):
+            img = draw_creature(params, unique=unique, seed=name, renderer=renderer)
+            encoded.append(encode_sprite_png(img, encoder))
+    return (name, encoded[0], encoded[1], os.getpid(), time.perf_counter() - start,
+            LAYER_CACHE.stats(), events)
+
+
+def render_code_version(encoder=PNG_ENCODER):
+    """Return a hash of the source of the code that produces sprite bytes.
+
+    Covers the drawing functions and ``encoder``'s PNG encoder, so editing
+    either invalidates incremental builds.
+    """
+    digest = hashlib.sha256()
+    for func in RENDER_FUNCTIONS + (encode_sprite_png,):
+        digest.update(inspect.getsource(func).encode("utf-8"))
+    for name in ENCODER_SOURCES[encoder]:
+        obj = getattr(encode_sprites, name)
+        digest.update((inspect.getsource(obj) if callable(obj) else repr(obj)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def sprite_build_key(name, params, unique, code_version, encoder=PNG_ENCODER):
+    """Hash everything that determines the bytes of one sprite file."""
+    payload = json.dumps({
+        'name': name,
+        'params': params,
+        'unique': unique,
+        'code': code_version,
+        'size': SPRITE_SIZE,
+        'png': PNG_SAVE_OPTIONS,
+        'encoder': encoder,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path):
+    """Return the sha256 of a file's contents, or None if it cannot be read."""
+    try:
+        with open(path, "rb") as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def write_if_changed(path, data):
+    """Write ``data`` to ``path`` unless the file already holds exactly those bytes.
+
+    Leaving identical files untouched keeps their mtimes stable, so downstream
+    caches keyed on modification time are not invalidated needlessly.
+    """
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return True
+
+
+def sprite_paths(name, assets_dir=ASSETS_DIR):
+    """Return the ``(base_path, unique_path)`` output files for a creature."""
+    return (os.path.join(assets_dir, "base", f"{name}_base.png"),
+            os.path.join(assets_dir, "unique", f"{name}_unique.png"))
+
+
+def is_up_to_date(manifest, path, key, assets_dir=ASSETS_DIR):
+    entry = manifest.get(os.path.relpath(path, assets_dir))
+    return bool(entry) and entry['key'] == key and file_sha256(path) == entry['sha256']
+
+
+def print_worker_summary(stats, wall_time):
+    """Print sprites rendered and throughput for each worker process."""
+    print(f"{'worker':>8} {'sprites':>8} {'busy s':>8} {'sprites/s':>10}")
+    for pid, (count, busy) in sorted(stats.items()):
+        rate = count / busy if busy else 0.0
+        print(f"{pid:>8} {count:>8} {busy:>8.3f} {rate:>10.1f}")
+    total = sum(count for count, _ in stats.values())
+    print(f"{len(stats)} worker(s), {total} sprites in {wall_time:.3f}s "
+          f"({total / wall_time if wall_time else 0.0:.1f} sprites/s)")
+
+
+# Functions whose source determines sprite pixels; hashed into every build key
+RENDER_FUNCTIONS = (sprite_seed, creature_features, _compile_display_list, _draw_op, replay_pillow)
+# Names in encode_sprites whose source (or value) determines each encoder's bytes
+ENCODER_SOURCES = {
+    'optimised': ('FILTERS', 'ZLIB_STRATEGIES', '_chunk', '_to_indexed', '_pack_rows',
+                  '_filtered', '_scanlines', 'encode_png'),
+    'pillow': (),
+}
+
+
+def generate_all(jobs=1, incremental=False, renderer='pillow', png_encoder=PNG_ENCODER,
+                 creatures=CREATURES, assets_dir=ASSETS_DIR, verbose=True, profile=None):
+    """Generate base and unique sprites for all defined creatures.
+
+    With ``jobs`` greater than one, drawing and PNG encoding are spread across
+    a process pool and the parent only writes the returned bytes to disk.
+
+    With ``incremental`` set, creatures whose build hash (params, render and
+    encoder code, output settings) matches the manifest and whose files are unchanged on
+    disk are skipped entirely. Files are only rewritten when their bytes differ.
+    The radiant and silhouette variants of every rendered creature (and of any
+    creature whose variant files are missing) are baked afterwards.
+
+    ``renderer`` picks the display list backend (see ``RENDERERS``); both
+    produce identical pixels. ``png_encoder`` selects the PNG encoder (see
+    ``PNG_ENCODER``).
+
+    ``creatures`` (``(name, params)`` pairs) and ``assets_dir`` default to the
+    roster and ``assets/creatures``; the benchmarks point them at synthetic
+    species and a scratch folder. ``verbose=False`` drops the per-creature
+    lines.
+
+    ``profile`` names a file to write a Chrome trace of every creature's
+    drawing stages, PNG encodes and file writes to (see ``write_profile``);
+    an aggregate table is printed as well. Unprofiled runs take the plain
+    drawing path.
+    """
+    started = time.perf_counter()
+    for folder in ("base", "unique"):
+        os.makedirs(os.path.join(assets_dir, folder), exist_ok=True)
+    manifest_path = os.path.join(assets_dir, os.path.basename(MANIFEST_PATH))
+    manifest = load_manifest(manifest_path)
+    code_version = render_code_version(png_encoder)
+    keys = {}
+    todo = []
+    for name, params in creatures:
+        base_path, unique_path = sprite_paths(name, assets_dir)
+        keys[base_path] = sprite_build_key(name, params, False, code_version, png_encoder)
+        keys[unique_path] = sprite_build_key(name, params, True, code_version, png_encoder)
+        if incremental and all(is_up_to_date(manifest, path, keys[path], assets_dir)
+                               for path in (base_path, unique_path)):
+            continue
+        todo.append((name, params))
+
+    stats = {}
+    layer_stats = {}
+    pool = None
+    if jobs > 1 and len(todo) > 1:
+        pool = futures.ProcessPoolExecutor(max_workers=jobs)
+        names, params_list = zip(*todo)
+        chunksize = max(1, len(todo) // (jobs * 4))
+        results = pool.map(render_creature_png, names, params_list,
+                           [renderer] * len(todo), [png_encoder] * len(todo),
+                           [bool(profile)] * len(todo), chunksize=chunksize)
+    else:
+        results = (render_creature_png(name, params, renderer, png_encoder, bool(profile))
+                   for name, params in todo)
+    trace = [] if profile else None
+    try:
+        for name, base_png, unique_png, pid, elapsed, cache_stats, events in results:
+            for form, path, data in zip(('base', 'unique'), sprite_paths(name, assets_dir),
+                                        (base_png, unique_png)):
+                if trace is not None:
+                    t0 = time.perf_counter()
+                    write_if_changed(path, data)
+                    events.append(('write', form, t0, time.perf_counter()))
+                else:
+                    write_if_changed(path, data)
+                manifest[os.path.relpath(path, assets_dir)] = {
+                    'key': keys[path],
+                    'sha256': hashlib.sha256(data).hexdigest(),
+                }
+            if verbose:
+                print(f"Generated {sprite_paths(name, assets_dir)[0]} and unique variant")
+            count, busy = stats.get(pid, (0, 0.0))
+            stats[pid] = (count + 2, busy + elapsed)
+            layer_stats[pid] = cache_stats
+            if trace is not None:
+                trace.append((name, pid, events))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if todo:
+        save_manifest(manifest, manifest_path)
+    skipped = len(creatures) - len(todo)
+    if skipped:
+        print(f"Skipped {skipped} up-to-date creature(s)")
+    if stats:
+        print_worker_summary(stats, time.perf_counter() - started)
+    rendered = {name for name, _ in todo}
+    bake = [name for name, _ in creatures
+            if name in rendered or not all(os.path.exists(path) for path in
+                                           bake_variants.variant_paths(name, assets_dir))]
+    bake_variants.bake_variants(bake, assets_dir, png_encoder, verbose)
+    if renderer == 'layers' and layer_stats:
+        hits = sum(st['hits'] for st in layer_stats.values())
+        misses = sum(st['misses'] for st in layer_stats.values())
+        print(f"Layer cache: {hits} hits, {misses} misses "
+              f"({100.0 * hits / ((hits + misses) or 1):.1f}% hit rate, "
+              f"{max(st['size'] for st in layer_stats.values())} masks max per worker)")
+    if trace:
+        write_profile(profile, trace, started)
+        print_profile_summary(trace)
+        print(f"Wrote trace for {len(trace)} creature(s) to {profile}")
+
+
+def write_profile(path, trace, origin):
+    """Write ``(name, pid, events)`` timings as Chrome trace-event JSON.
+
+    Every stage becomes a complete (``"ph": "X"``) event on its process's
+    track, in microseconds since ``origin``; per-creature spans enclose their
+    stages. File writes happen in this process and go on its own track.
+    Load the file in ``chrome://tracing`` or Perfetto.
+    """
+    out = []
+    parent = os.getpid()
+    for name, pid, events in trace:
+        for stage, form, t0, t1 in events:
+            track = parent if stage == 'write' else pid
+            out.append({'name': name if stage == 'creature' else stage,
+                        'cat': 'creature' if stage == 'creature' else form,
+                        'ph': 'X', 'pid': track, 'tid': track,
+                        'ts': round((t0 - origin) * 1e6, 3), 'dur': round((t1 - t0) * 1e6, 3),
+                        'args': {'creature': name, 'form': form}})
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({'traceEvents': out, 'displayTimeUnit': 'ms'}, fh)
+
+
+def print_profile_summary(trace):
+    """Print count, total, mean and max time per stage across all creatures.
+
+    Shares are of the total profiled work: every creature span (drawing and
+    encoding, in whichever process ran it) plus the parent's file writes,
+    which happen after the span closes. Time inside a creature span not
+    covered by a stage is reported as ``other``, so the shares add up to 100%.
+    """
+    totals = {}
+
+    def add(stage, seconds):
+        count, total, worst = totals.get(stage, (0, 0.0, 0.0))
+        totals[stage] = (count + 1, total + seconds, max(worst, seconds))
+
+    for _, _, events in trace:
+        spans = [(stage, t1 - t0) for stage, _, t0, t1 in events]
+        for stage, seconds in spans:
+            add(stage, seconds)
+        creature = sum(seconds for stage, seconds in spans if stage == 'creature')
+        if creature:
+            add('other', max(0.0, creature - sum(seconds for stage, seconds in spans
+                                                 if stage not in ('creature', 'write'))))
+    creature_total = totals.pop('creature', (0, 0.0, 0.0))[1]
+    work = (creature_total + totals.get('write', (0, 0.0, 0.0))[1]) or 1.0
+    order = ('compile',) + STAGES + ('replay', 'encode', 'other', 'write')
+    print(f"{'stage':<10} {'count':>7} {'total ms':>10} {'mean us':>9} {'max us':>9} {'share':>6}")
+    for stage in sorted(totals, key=lambda st: order.index(st) if st in order else len(order)):
+        count, total, worst = totals[stage]
+        print(f"{stage:<10} {count:>7} {total * 1000:>10.2f} {total / count * 1e6:>9.1f} "
+              f"{worst * 1e6:>9.1f} {100.0 * total / work:>5.1f}%")
+    print(f"{'total':<10} {'':>7} {work * 1000:>10.2f}")
+
+
+def pixel_hashes():
+    """Render every creature in memory and hash the raw RGBA pixels of each form."""
+    hashes = {}
     for name, params in CREATURES:
-        base_img = draw_creature(params, unique=False)
-        unique_img = draw_creature(params, unique=True)
-        base_path = os.path.join(BASE_OUTPUT, f"{name}_base.png")
-        unique_path = os.path.join(UNIQUE_OUTPUT, f"{name}_unique.png")
-        base_img.save(base_path)
-        unique_img.save(unique_path)
-        print(f"Generated {base_path} and unique variant")
+        for unique in (False, True):
+            img = draw_creature(params, unique=unique, seed=name)
+            key = f"{name}_{'unique' if unique else 'base'}"
+            hashes[key] = hashlib.sha256(img.tobytes()).hexdigest()
+    return hashes
+
+
+def verify_golden(update=False):
+    """Compare rendered pixel hashes against the checked-in golden table.
+
+    Returns the list of sprite keys that differ (or are missing from either
+    side). With ``update`` set, the table is rewritten from the current render
+    instead. Hashes are taken over pixels rather than PNG bytes so an encoder
+    upgrade does not register as a rendering regression.
+    """
+    actual = pixel_hashes()
+    if update:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as fh:
+            json.dump(actual, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+        return []
+    with open(GOLDEN_PATH, "r", encoding="utf-8") as fh:
+        expected = json.load(fh)
+    return sorted(key for key in set(actual) | set(expected)
+                  if actual.get(key) != expected.get(key))
+
+
+def import_cost(module, runs=5):
+    """Return ``(seconds, imported_modules)`` for a cold ``import module``.
+
+    Each run is a fresh interpreter under ``-X importtime``; the fastest run's
+    cumulative time for ``module`` is reported.
+    """
+    best = None
+    imported = set()
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=BASE_DIR, capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not cumulative.strip().isdigit():
+                continue
+            imported.add(name.strip())
+            if name.strip() == module:
+                seconds = int(cumulative) / 1e6
+                best = seconds if best is None else min(best, seconds)
+    return best, imported
+
+
+def check_import_time(budgets=IMPORT_BUDGETS):
+    """Check cold import times against ``budgets``; returns a list of failures."""
+    failures = []
+    for module, budget in budgets.items():
+        seconds, imported = import_cost(module)
+        heavy = sorted(name for name in imported if name.split(".")[0] in HEAVY_MODULES
+                       or name in HEAVY_MODULES)
+        status = "ok" if seconds <= budget and not heavy else "FAIL"
+        print(f"{module:<20} {seconds * 1000:7.1f} ms (budget {budget * 1000:.0f} ms) {status}"
+              + (f", imports {', '.join(heavy)}" if heavy else ""))
+        if status != "ok":
+            failures.append(module)
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate creature sprites.")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes for drawing/encoding (0 = one per CPU)")
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help="only rebuild sprites whose build hash or output file changed")
+    parser.add_argument('--renderer', choices=sorted(RENDERERS), default='pillow',
+                        help="display list backend: ImageDraw calls or cached layer masks")
+    parser.add_argument('--png-encoder', choices=('optimised', 'pillow'), default=PNG_ENCODER,
+                        help="lossless size-optimised PNG search or Pillow's plain encoder")
+    parser.add_argument('--export-display-lists', metavar='FILE',
+                        help="write the compiled display list of every sprite to FILE as JSON")
+    parser.add_argument('--verify-golden', action='store_true',
+                        help="render in memory and check pixel hashes against golden_hashes.json")
+    parser.add_argument('--update-golden', action='store_true',
+                        help="rewrite golden_hashes.json from the current render")
+    parser.add_argument('--check-import-time', action='store_true',
+                        help="check cold import times and that Pillow/NumPy load lazily")
+    parser.add_argument('--profile', nargs='?', const=PROFILE_PATH, metavar='FILE',
+                        help="time every drawing stage, encode and write; write a Chrome trace "
+                             "to FILE (default: profile_trace.json) and print a summary")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="also run generate_all under cProfile and dump its stats to FILE")
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
-    generate_all()
\ No newline at end of file
+    args = parse_args()
+    if args.export_display_lists:
+        with open(args.export_display_lists, "w", encoding="utf-8") as fh:
+            json.dump({f"{name}_{'unique' if unique else 'base'}":
+                       display_list_to_json(compile_creature(params, unique, name))
+                       for name, params in CREATURES for unique in (False, True)}, fh)
+        raise SystemExit(0)
+    if args.check_import_time:
+        raise SystemExit(1 if check_import_time() else 0)
+    if args.verify_golden or args.update_golden:
+        started = time.perf_counter()
+        mismatches = verify_golden(update=args.update_golden)
+        for key in mismatches:
+            print(f"MISMATCH {key}")
+        print(f"Checked {len(CREATURES) * 2} sprites in {time.perf_counter() - started:.3f}s")
+        raise SystemExit(1 if mismatches else 0)
+    options = dict(jobs=args.jobs or os.cpu_count() or 1, incremental=args.incremental,
+                   renderer=args.renderer, png_encoder=args.png_encoder, profile=args.profile)
+    if args.cprofile:
+        # Covers the parent process only; pool workers are not profiled
+        profiler = cProfile.Profile()
+        profiler.runcall(generate_all, **options)
+        profiler.dump_stats(args.cprofile)
+        print(f"Wrote cProfile stats to {args.cprofile}")
+    else:
+        generate_all(**options)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Procedural species generator for the shiny hunting game.
+
+The hand-written ``CREATURES`` roster has fifty entries; this module derives
+as many seeded species per biome and phase as the content plan needs. Each
+biome/phase group has a rule set:
+
+``palette``  – anchor body colours, each channel jittered by up to ``jitter``
+``tail``     – relative weights of the tail kinds
+``spines``   – relative weights of 0–4 spines
+``horns``, ``crest``, ``spots``, ``fins`` – probability of each feature
+
+``roster_rules()`` builds the default rules from the roster itself (its
+colours as the palette, its feature frequencies with add-one smoothing so
+every combination stays reachable); ``--rules FILE`` loads a JSON file of the
+same shape instead. The params of species ``index`` in a group come from a
+private RNG seeded with ``(seed, biome, phase, index)``, so any species can
+be regenerated on its own and runs are reproducible.
+
+Generation streams: species are described by ``(biome, phase, index)``
+triples produced lazily, handed to the renderer a chunk at a time, drawn with
+``draw_creature``, encoded and written, and dropped. At most ``jobs * 2``
+chunks are in flight, so memory per worker stays flat whether a run
+produces a thousand species or a hundred thousand. Every species is drawn
+once, so the display list compile cache is cleared after each chunk rather
+than left to fill up. Streaming runs keep no build manifest; rendering is
+deterministic and files are only rewritten when their bytes change, so a
+rerun is cheap on disk but redraws everything.
+
+``--check-memory`` runs two sizes in-process under ``tracemalloc`` with the
+``--png-encoder`` a real build would use and fails if the peak grows with the
+species count.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent import futures
+
+from creature_catalogue import BASE_DIR, CREATURES, clear_compile_cache, sprite_seed
+from generate_creatures import (PNG_ENCODER, RENDERERS, draw_creature, encode_sprite_png, sprite_paths,
+                                write_if_changed)
+
+SPECIES_DIR = os.path.join(BASE_DIR, "assets", "species")
+PHASES = ('day', 'night')
+TAIL_KINDS = ('leaf', 'long', 'fin', 'normal')
+FLAGS = ('horns', 'crest', 'spots', 'fins')
+MAX_SPINES = 4
+DEFAULT_JITTER = 18
+DEFAULT_CHUNK = 64
+# Species counts for ``--check-memory`` and the allowed peak growth between them
+MEMORY_CHECK_SIZES = (1000, 10000)
+MEMORY_TOLERANCE = 0.25
+
+
+def roster_biomes():
+    """Return the biome prefixes of ``CREATURES`` in roster order."""
+    return tuple(dict.fromkeys(name.split('_', 1)[0] for name, _ in CREATURES))
+
+
+def roster_rules():
+    """Derive per-biome, per-phase rules from the hand-written roster.
+
+    The roster lists each biome's five day creatures followed by its five
+    night creatures.
+    """
+    groups = {}
+    for biome in roster_biomes():
+        entries = [params for name, params in CREATURES if name.split('_', 1)[0] == biome]
+        half = len(entries) // 2
+        for phase, members in zip(PHASES, (entries[:half], entries[half:])):
+            n = len(members)
+            rules = {
+                'palette': [list(params['color']) for params in members],
+                'jitter': DEFAULT_JITTER,
+                'tail': {kind: 1 + sum(params.get('tail', 'normal') == kind for params in members)
+                         for kind in TAIL_KINDS},
+                'spines': [1 + sum(params.get('spines', 0) == count for params in members)
+                           for count in range(MAX_SPINES + 1)],
+            }
+            for flag in FLAGS:
+                rules[flag] = (1 + sum(bool(params.get(flag)) for params in members)) / (n + 2)
+            groups.setdefault(biome, {})[phase] = rules
+    return groups
+
+
+def load_rules(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def species_name(biome, phase, index):
+    return f"{biome}_{phase}_{index:06d}"
+
+
+def species_params(rules, biome, phase, index, seed=0):
+    """Return the drawing params of one procedural species.
+
+    Only ``(seed, biome, phase, index)`` and the group's rules go into the
+    result, so species can be generated independently and in any order.
+    """
+    group = rules[biome][phase]
+    rng = random.Random(sprite_seed([seed, biome, phase, index]))
+    anchor = rng.choice(group['palette'])
+    jitter = group.get('jitter', DEFAULT_JITTER)
+    tails = sorted(group['tail'])
+    params = {
+        'color': tuple(max(0, min(255, c + rng.randint(-jitter, jitter))) for c in anchor),
+        'tail': rng.choices(tails, weights=[group['tail'][kind] for kind in tails])[0],
+        'spines': rng.choices(range(len(group['spines'])), weights=group['spines'])[0],
+    }
+    for flag in FLAGS:
+        params[flag] = rng.random() < group[flag]
+    return params
+
+
+def iter_species(per_group, biomes, phases=PHASES):
+    """Yield ``(biome, phase, index)`` for ``per_group`` species of every group, lazily."""
+    for biome, phase in itertools.product(biomes, phases):
+        for index in range(per_group):
+            yield biome, phase, index
+
+
+def render_species_chunk(rules, seed, chunk, renderer='pillow', encoder=PNG_ENCODER):
+    """Draw and encode both forms of a chunk of species.
+
+    This is the unit of work handed to pool workers; only the species
+    triples go in, and ``[(name, base_png, unique_png), ...]`` comes back.
+    """
+    out = []
+    for biome, phase, index in chunk:
+        name = species_name(biome, phase, index)
+        params = species_params(rules, biome, phase, index, seed)
+        out.append((name,) + tuple(
+            encode_sprite_png(draw_creature(params, unique=unique, seed=name, renderer=renderer),
+                              encoder)
+            for unique in (False, True)))
+    # each species is drawn once, so keeping its display lists only costs memory
+    clear_compile_cache()
+    return out
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = tuple(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _render_chunks(rules, seed, chunks, jobs, renderer, encoder):
+    """Yield rendered chunks, keeping at most ``jobs * 2`` of them in flight."""
+    if jobs <= 1:
+        for chunk in chunks:
+            yield render_species_chunk(rules, seed, chunk, renderer, encoder)
+        return
+    # Executor.map would submit the whole input up front; submit a bounded
+    # window instead and refill it as chunks complete
+    with futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(render_species_chunk, rules, seed, chunk, renderer, encoder))
+            if len(pending) >= jobs * 2:
+                done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in futures.as_completed(pending):
+            yield future.result()
+
+
+def generate_species(per_group, biomes=None, phases=PHASES, rules=None, seed=0, jobs=1,
+                     renderer='pillow', png_encoder=PNG_ENCODER, assets_dir=SPECIES_DIR,
+                     chunk=DEFAULT_CHUNK, verbose=True):
+    """Generate base and unique sprites for ``per_group`` species of every group.
+
+    ``biomes`` defaults to every biome in ``rules`` (the roster rules unless
+    given). Returns ``(species, bytes_written)``.
+    """
+    started = time.perf_counter()
+    rules = rules or roster_rules()
+    biomes = biomes or tuple(rules)
+    for folder in ("base", "unique"):
+        os.makedirs(os.path.join(assets_dir, folder), exist_ok=True)
+    species = written = 0
+    chunks = _chunks(iter_species(per_group, biomes, phases), chunk)
+    for rendered in _render_chunks(rules, seed, chunks, jobs, renderer, png_encoder):
+        for name, base_png, unique_png in rendered:
+            for path, data in zip(sprite_paths(name, assets_dir), (base_png, unique_png)):
+                write_if_changed(path, data)
+                written += len(data)
+        species += len(rendered)
+    if verbose:
+        elapsed = time.perf_counter() - started
+        print(f"Generated {species} species, {species * 2} sprites, {written} bytes in "
+              f"{elapsed:.2f}s ({species * 2 / elapsed if elapsed else 0.0:.1f} sprites/s)")
+    return species, written
+
+
+def traced_peak(total, chunk=DEFAULT_CHUNK, png_encoder=PNG_ENCODER):
+    """Return the ``tracemalloc`` peak in bytes of an in-process run of ``total`` species."""
+    rules = roster_rules()
+    biomes = tuple(rules)
+    per_group = -(-total // (len(biomes) * len(PHASES)))
+    scratch = tempfile.mkdtemp(prefix="generate_species_")
+    try:
+        # warm up imports, the layer cache and encoder tables outside the trace
+        generate_species(1, biomes, rules=rules, png_encoder=png_encoder,
+                         assets_dir=scratch, chunk=chunk, verbose=False)
+        tracemalloc.start()
+        try:
+            generate_species(per_group, biomes, rules=rules, png_encoder=png_encoder,
+                             assets_dir=scratch, chunk=chunk, verbose=False)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def check_memory(sizes=MEMORY_CHECK_SIZES, tolerance=MEMORY_TOLERANCE, png_encoder=PNG_ENCODER):
+    """Check that the traced peak does not grow with the species count.
+
+    Runs in this process, as one pool worker would; returns True on success.
+    """
+    peaks = []
+    for total in sizes:
+        peak = traced_peak(total, png_encoder=png_encoder)
+        peaks.append(peak)
+        print(f"{total:>8} species: traced peak {peak / 1024:8.1f} KiB")
+    growth = max(peaks) / min(peaks) - 1
+    ok = growth <= tolerance
+    print(f"peak growth {growth:.1%} (tolerance {tolerance:.0%}) {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate procedural creature species.")
+    parser.add_argument('--per-group', '-n', type=int, default=100,
+                        help="species per biome and phase")
+    parser.add_argument('--biomes', nargs='+', help="biomes to generate (default: all in the rules)")
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES))
+    parser.add_argument('--rules', metavar='FILE', help="JSON rules file (default: derived from the roster)")
+    parser.add_argument('--dump-rules', metavar='FILE', help="write the roster-derived rules to FILE and exit")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes for drawing/encoding (0 = one per CPU)")
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help="species per unit of work")
+    parser.add_argument('--renderer', choices=sorted(RENDERERS), default='pillow')
+    parser.add_argument('--png-encoder', choices=('optimised', 'pillow'), default=PNG_ENCODER)
+    parser.add_argument('--output', '-o', default=SPECIES_DIR, help="output folder")
+    parser.add_argument('--check-memory', action='store_true',
+                        help="check with tracemalloc that peak memory stays flat as the count grows")
+    parser.add_argument('--check-sizes', type=int, nargs=2, default=list(MEMORY_CHECK_SIZES),
+                        help="species counts compared by --check-memory")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.dump_rules:
+        with open(args.dump_rules, "w", encoding="utf-8") as fh:
+            json.dump(roster_rules(), fh, indent=1)
+            fh.write("\n")
+        raise SystemExit(0)
+    if args.check_memory:
+        raise SystemExit(0 if check_memory(args.check_sizes, png_encoder=args.png_encoder) else 1)
+    generate_species(args.per_group, args.biomes, args.phases,
+                     rules=load_rules(args.rules) if args.rules else None, seed=args.seed,
+                     jobs=args.jobs or os.cpu_count() or 1, renderer=args.renderer,
+                     png_encoder=args.png_encoder, assets_dir=args.output, chunk=args.chunk)
@@ -12,6 +12,15 @@
   // Data definitions
   // Catch rate distribution – applied to 10 creatures in each biome in order
   const CATCH_RATES = [95, 90, 80, 75, 70, 50, 45, 40, 35, 25];
+  // Canvas size of every generated sprite (SPRITE_SIZE in generate_creatures.py)
+  const SPRITE_SIZE = 100;
+
+  // Map of logical asset paths to content-hashed files, inlined into index.html
+  // by build_store.py. Unbuilt (development) checkouts load assets by name.
+  const ASSET_MANIFEST = window.ASSET_MANIFEST || null;
+  function assetUrl(path) {
+    return (ASSET_MANIFEST && ASSET_MANIFEST[path]) || path;
+  }
 
   // Define creatures and assign catch rates by biome/time order
   // This list corresponds to the images generated by generate_creatures.py.
@@ -38,9 +47,134 @@
       id,
       name: displayName.charAt(0).toUpperCase() + displayName.slice(1),
       catchRate,
-      baseImg: `assets/creatures/base/${id}_base.png`,
-      uniqueImg: `assets/creatures/unique/${id}_unique.png`
+      baseImg: assetUrl(`assets/creatures/base/${id}_base.png`),
+      uniqueImg: assetUrl(`assets/creatures/unique/${id}_unique.png`),
+      radiantImg: assetUrl(`assets/creatures/radiant/${id}_radiant.png`),
+      silhouetteImg: assetUrl(`assets/creatures/silhouette/${id}_silhouette.png`),
+      baseFrame: `${id}_base`,
+      uniqueFrame: `${id}_unique`,
+      radiantFrame: `${id}_radiant`,
+      silhouetteFrame: `${id}_silhouette`
+    };
+  }
+
+  // Sprite atlas produced by pack_atlas.py. Frames are drawn from the atlas
+  // pages when the frame map is available; otherwise each sprite falls back to
+  // its individual PNG.
+  const ATLAS_DIR = 'assets/creatures/';
+  let atlas = null;
+  const atlasReady = fetch(assetUrl(ATLAS_DIR + 'atlas.json'))
+    .then(res => (res.ok ? res.json() : null))
+    .then(map => {
+      if (map) {
+        atlas = {
+          frames: map.frames,
+          pages: map.pages.map(src => {
+            const page = new Image();
+            page.src = assetUrl(ATLAS_DIR + src);
+            return page;
+          })
+        };
+      }
+    })
+    .catch(() => {});
+
+  // Background resolution ladder produced by build_backgrounds.py. Without the
+  // manifest, backgrounds fall back to the original PNGs.
+  const BACKGROUND_DIR = 'assets/backgrounds/';
+  let backgroundManifest = null;
+  const backgroundsReady = fetch(assetUrl(BACKGROUND_DIR + 'manifest.json'))
+    .then(res => (res.ok ? res.json() : null))
+    .then(manifest => {
+      backgroundManifest = manifest;
+    })
+    .catch(() => {});
+
+  // Pick the smallest ladder variant that covers the viewport (background-size:
+  // cover) at the device pixel ratio
+  function pickBackgroundVariant(entry) {
+    const dpr = window.devicePixelRatio || 1;
+    const needed = Math.max(window.innerWidth, window.innerHeight * entry.width / entry.height) * dpr;
+    return entry.variants.find(v => v.width >= needed) || entry.variants[entry.variants.length - 1];
+  }
+
+  // Wait for an image to finish decoding
+  function decodeImage(img) {
+    if (img.decode) return img.decode();
+    return new Promise((resolve, reject) => {
+      img.onload = resolve;
+      img.onerror = reject;
+    });
+  }
+
+  // Decode a ladder variant off-screen, preferring WebP and falling back to JPEG
+  function loadVariant(variant) {
+    const load = src => {
+      const img = new Image();
+      img.src = assetUrl(BACKGROUND_DIR + src);
+      return decodeImage(img).then(() => img.src);
     };
+    return load(variant.webp).catch(() => load(variant.jpeg));
+  }
+
+  // Set an element's background to the best available variant of a source
+  // file. The inline placeholder and dominant colour from the manifest are
+  // shown straight away and replaced once the full image has decoded.
+  // dataset.background is the latest request, dataset.shown/shownSrc the
+  // decoded image last painted.
+  function setBackground(el, file) {
+    el.dataset.background = file;
+    return backgroundsReady.then(() => {
+      const entry = backgroundManifest && backgroundManifest[file];
+      if (!entry) {
+        el.style.backgroundImage = `url(${assetUrl(BACKGROUND_DIR + file)})`;
+        return;
+      }
+      if (el.dataset.shown === file) {
+        // A request made since may have painted its placeholder over this
+        // image before being superseded, so paint the decoded image again
+        el.style.backgroundColor = entry.color || '';
+        el.style.backgroundImage = `url(${el.dataset.shownSrc})`;
+        return;
+      }
+      el.style.backgroundColor = entry.color || '';
+      if (entry.placeholder) el.style.backgroundImage = `url(${entry.placeholder})`;
+      return loadVariant(pickBackgroundVariant(entry)).then(src => {
+        // Ignore if another background was requested while this one loaded
+        if (el.dataset.background !== file) return;
+        el.style.backgroundImage = `url(${src})`;
+        el.dataset.shown = file;
+        el.dataset.shownSrc = src;
+      }).catch(() => {});
+    });
+  }
+
+  // Draw a sprite frame into a canvas, using the atlas when it has the frame
+  function drawSprite(canvas, frameKey, fallbackSrc) {
+    canvas.dataset.frame = frameKey;
+    const ctx = canvas.getContext('2d');
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    atlasReady.then(() => {
+      const frame = atlas && atlas.frames[frameKey];
+      const source = frame ? atlas.pages[frame.page] : new Image();
+      const paint = () => {
+        // Skip if the canvas has been given a different sprite in the meantime
+        if (canvas.dataset.frame !== frameKey) return;
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        if (frame) {
+          ctx.drawImage(source, frame.x, frame.y, frame.w, frame.h,
+            frame.offsetX, frame.offsetY, frame.w, frame.h);
+        } else {
+          ctx.drawImage(source, 0, 0);
+        }
+      };
+      if (!frame) source.src = fallbackSrc;
+      if (source.complete && source.naturalWidth) {
+        paint();
+      } else {
+        source.addEventListener('load', paint, { once: true });
+      }
+    });
   }
 
   // Biome definitions. Each biome lists the creatures that can be encountered during
@@ -167,27 +301,35 @@
     if (screen === biomeScreen) {
       updateDayNightIndicator();
     }
+    if (screen === overworldScreen) {
+      openMap();
+    }
     saveData();
   }
 
-  // Update the day/night indicator and apply overlay for night
+  // Update the day/night indicator and swap in the pre-rendered night
+  // background (build_backgrounds.py); the brightness filter is only a
+  // fallback for when no night variant is available
   function updateDayNightIndicator() {
     const phase = getDayPhase();
     dayNightIndicator.textContent = phase.toUpperCase();
-    if (phase === 'night') {
-      biomeBg.style.filter = 'brightness(0.6)';
-    } else {
-      biomeBg.style.filter = 'brightness(1)';
-    }
+    if (!currentBiome) return;
+    const dayFile = BIOMES[currentBiome].background;
+    const nightFile = dayFile.replace('_day.', '_night.');
+    backgroundsReady.then(() => {
+      const baked = phase === 'night' && backgroundManifest && backgroundManifest[nightFile];
+      setBackground(biomeBg, baked ? nightFile : dayFile);
+      biomeBg.style.filter = (phase === 'night' && !baked) ? 'brightness(0.6)' : '';
+    });
   }
 
   // Enter a biome
   function enterBiome(biomeKey) {
     currentBiome = biomeKey;
+    precacheBiome(biomeKey);
     rapidRemaining = 0; // when entering a new biome, reset rapid
     lastUpdate = Date.now();
     biomeTitle.textContent = BIOMES[biomeKey].displayName;
-    biomeBg.style.backgroundImage = `url(assets/backgrounds/${BIOMES[biomeKey].background})`;
     biomeLog.innerHTML = '';
     updateEncounterCount();
     updateDayNightIndicator();
@@ -257,20 +399,14 @@
   function showEncounter({ creatureId, variant }) {
     const info = CREATURES[creatureId];
     // Set background of encounter screen based on biome
-    encounterBg.style.backgroundImage = biomeBg.style.backgroundImage;
-    // Choose appropriate image
-    let imgSrc;
+    setBackground(encounterBg, BIOMES[currentBiome].background);
+    // Choose appropriate image (radiant art is pre-baked by bake_variants.py)
     if (variant === 'unique') {
-      imgSrc = info.uniqueImg;
-    } else {
-      imgSrc = info.baseImg;
-    }
-    encounterImage.src = imgSrc;
-    // Apply filter for radiant variant
-    if (variant === 'radiant') {
-      encounterImage.style.filter = 'hue-rotate(160deg) saturate(1.5) brightness(1.2)';
+      drawSprite(encounterImage, info.uniqueFrame, info.uniqueImg);
+    } else if (variant === 'radiant') {
+      drawSprite(encounterImage, info.radiantFrame, info.radiantImg);
     } else {
-      encounterImage.style.filter = '';
+      drawSprite(encounterImage, info.baseFrame, info.baseImg);
     }
     encounterName.textContent = `${info.name} (${variant.toUpperCase()})`;
     catchRateEl.textContent = `Catch chance: ${info.catchRate}%`;
@@ -350,17 +486,17 @@
       const entry = codex[cid];
       const container = document.createElement('div');
       container.classList.add('codex-entry');
-      const imgEl = document.createElement('img');
-      if (entry.standard || entry.radiant || entry.unique) {
-        imgEl.src = info.baseImg;
-        if (entry.unique) {
-          imgEl.src = info.uniqueImg;
-        } else if (entry.radiant) {
-          imgEl.style.filter = 'hue-rotate(160deg) saturate(1.5) brightness(1.2)';
-        }
+      const imgEl = document.createElement('canvas');
+      imgEl.width = SPRITE_SIZE;
+      imgEl.height = SPRITE_SIZE;
+      if (entry.unique) {
+        drawSprite(imgEl, info.uniqueFrame, info.uniqueImg);
+      } else if (entry.radiant) {
+        drawSprite(imgEl, info.radiantFrame, info.radiantImg);
+      } else if (entry.standard) {
+        drawSprite(imgEl, info.baseFrame, info.baseImg);
       } else {
-        imgEl.src = info.baseImg;
-        imgEl.style.filter = 'grayscale(100%) brightness(0.3)';
+        drawSprite(imgEl, info.silhouetteFrame, info.silhouetteImg);
       }
       const nameEl = document.createElement('div');
       nameEl.classList.add('name');
@@ -371,8 +507,9 @@
     }
   }
 
-  // Create clickable biome regions on the map
-  function setupMapRegions() {
+  // Create clickable biome regions on the map. Regions are positioned in
+  // percentages of the map image, so they follow it when it is zoomed.
+  function setupMapRegions(parent) {
     // Coordinates are relative percentages (left, top, width, height)
     const regions = {
       verdant: { left: 6, top: 10, width: 25, height: 30 },
@@ -392,11 +529,227 @@
       div.style.height = r.height + '%';
       div.style.cursor = 'pointer';
       div.style.background = 'rgba(0,0,0,0)';
-      div.addEventListener('click', () => enterBiome(biomeKey));
-      mapContainer.appendChild(div);
+      div.addEventListener('click', () => {
+        // A drag that ends over a region pans the map, it doesn't enter it
+        if (mapView && mapView.dragged) return;
+        enterBiome(biomeKey);
+      });
+      parent.appendChild(div);
     }
   }
 
+  // Deep Zoom tile pyramid of the overworld produced by build_tiles.py. The
+  // viewer shows the single-tile overview level at once, then loads only the
+  // tiles of the level matching the current zoom that intersect the viewport.
+  const MAP_DZI = 'assets/backgrounds/overworld.dzi';
+  const MAP_MAX_ZOOM = 2;
+  let mapView = null;
+
+  // Parse a .dzi descriptor into the pyramid geometry
+  function loadDzi(url) {
+    return fetch(assetUrl(url))
+      .then(res => {
+        if (!res.ok) throw new Error(res.status);
+        return res.text();
+      })
+      .then(text => {
+        const doc = new DOMParser().parseFromString(text, 'application/xml');
+        const image = doc.getElementsByTagName('Image')[0];
+        const size = doc.getElementsByTagName('Size')[0];
+        if (!image || !size) throw new Error('bad dzi');
+        const width = parseInt(size.getAttribute('Width'), 10);
+        const height = parseInt(size.getAttribute('Height'), 10);
+        const tileSize = parseInt(image.getAttribute('TileSize'), 10);
+        return {
+          width,
+          height,
+          tileSize,
+          overlap: parseInt(image.getAttribute('Overlap'), 10) || 0,
+          format: image.getAttribute('Format'),
+          maxLevel: Math.ceil(Math.log2(Math.max(width, height))),
+          // Highest level that fits in one tile – the instant overview
+          overviewLevel: Math.ceil(Math.log2(Math.max(width, height))) -
+            Math.max(0, Math.ceil(Math.log2(Math.max(width, height) / tileSize))),
+          tileBase: url.replace(/\.dzi$/, '_files/')
+        };
+      });
+  }
+
+  // Place a tile image in full-resolution image coordinates
+  function placeTile(img, dzi, level, col, row) {
+    const factor = Math.pow(2, dzi.maxLevel - level);
+    const levelW = Math.ceil(dzi.width / factor);
+    const levelH = Math.ceil(dzi.height / factor);
+    const x0 = Math.max(0, col * dzi.tileSize - dzi.overlap);
+    const y0 = Math.max(0, row * dzi.tileSize - dzi.overlap);
+    const x1 = Math.min(levelW, (col + 1) * dzi.tileSize + dzi.overlap);
+    const y1 = Math.min(levelH, (row + 1) * dzi.tileSize + dzi.overlap);
+    img.style.left = x0 * factor + 'px';
+    img.style.top = y0 * factor + 'px';
+    img.style.width = (x1 - x0) * factor + 'px';
+    img.style.height = (y1 - y0) * factor + 'px';
+  }
+
+  function tileUrl(dzi, level, col, row) {
+    return assetUrl(`${dzi.tileBase}${level}/${col}_${row}.${dzi.format}`);
+  }
+
+  // Keep the map covering the container and apply the current transform
+  function applyMapTransform() {
+    const v = mapView;
+    const w = mapContainer.clientWidth;
+    const h = mapContainer.clientHeight;
+    v.x = Math.min(0, Math.max(w - v.dzi.width * v.scale, v.x));
+    v.y = Math.min(0, Math.max(h - v.dzi.height * v.scale, v.y));
+    v.layer.style.transform = `translate(${v.x}px, ${v.y}px) scale(${v.scale})`;
+  }
+
+  // Load the visible tiles of the level matching the zoom and drop the rest
+  function updateMapTiles() {
+    const v = mapView;
+    const dzi = v.dzi;
+    const dpr = window.devicePixelRatio || 1;
+    const level = Math.max(dzi.overviewLevel, Math.min(dzi.maxLevel,
+      dzi.maxLevel - Math.floor(Math.log2(1 / (v.scale * dpr)))));
+    const factor = Math.pow(2, dzi.maxLevel - level);
+    const span = dzi.tileSize * factor;
+    // Visible rectangle in full-resolution image pixels
+    const left = -v.x / v.scale;
+    const top = -v.y / v.scale;
+    const right = left + mapContainer.clientWidth / v.scale;
+    const bottom = top + mapContainer.clientHeight / v.scale;
+    const cols = Math.ceil(dzi.width / span);
+    const rows = Math.ceil(dzi.height / span);
+    const wanted = new Set();
+    for (let col = Math.max(0, Math.floor(left / span)); col < Math.min(cols, Math.ceil(right / span)); col++) {
+      for (let row = Math.max(0, Math.floor(top / span)); row < Math.min(rows, Math.ceil(bottom / span)); row++) {
+        const key = `${level}/${col}_${row}`;
+        wanted.add(key);
+        if (v.tiles.has(key)) continue;
+        const img = new Image();
+        img.className = 'map-tile';
+        img.alt = '';
+        img.draggable = false;
+        placeTile(img, dzi, level, col, row);
+        img.src = tileUrl(dzi, level, col, row);
+        // Only reveal a tile once decoded so coarser imagery never flickers out
+        decodeImage(img).then(() => img.classList.add('loaded')).catch(() => {});
+        v.tileLayer.appendChild(img);
+        v.tiles.set(key, img);
+      }
+    }
+    for (const [key, img] of v.tiles) {
+      if (!wanted.has(key)) {
+        img.remove();
+        v.tiles.delete(key);
+      }
+    }
+  }
+
+  // Zoom by a factor around a point given in container coordinates
+  function zoomMap(factor, cx, cy) {
+    const v = mapView;
+    const scale = Math.min(MAP_MAX_ZOOM, Math.max(v.minScale, v.scale * factor));
+    v.x = cx - (cx - v.x) * scale / v.scale;
+    v.y = cy - (cy - v.y) * scale / v.scale;
+    v.scale = scale;
+    applyMapTransform();
+    updateMapTiles();
+  }
+
+  // Fit the whole map to cover the container (like object-fit: cover)
+  function fitMap() {
+    const v = mapView;
+    const w = mapContainer.clientWidth;
+    const h = mapContainer.clientHeight;
+    if (!w || !h) return;
+    const previous = v.minScale;
+    v.minScale = Math.max(w / v.dzi.width, h / v.dzi.height);
+    if (!previous || v.scale < v.minScale) {
+      v.scale = v.minScale;
+      v.x = (w - v.dzi.width * v.scale) / 2;
+      v.y = (h - v.dzi.height * v.scale) / 2;
+    }
+    applyMapTransform();
+    updateMapTiles();
+  }
+
+  function setupMapInput() {
+    let drag = null;
+    mapContainer.addEventListener('wheel', e => {
+      e.preventDefault();
+      const rect = mapContainer.getBoundingClientRect();
+      zoomMap(Math.pow(2, -e.deltaY / 500), e.clientX - rect.left, e.clientY - rect.top);
+    }, { passive: false });
+    mapContainer.addEventListener('pointerdown', e => {
+      drag = { id: e.pointerId, x: e.clientX, y: e.clientY, moved: 0 };
+      mapView.dragged = false;
+    });
+    mapContainer.addEventListener('pointermove', e => {
+      if (!drag || drag.id !== e.pointerId) return;
+      const dx = e.clientX - drag.x;
+      const dy = e.clientY - drag.y;
+      drag.x = e.clientX;
+      drag.y = e.clientY;
+      drag.moved += Math.abs(dx) + Math.abs(dy);
+      if (drag.moved > 5) {
+        mapView.dragged = true;
+        mapContainer.setPointerCapture(e.pointerId);
+      }
+      mapView.x += dx;
+      mapView.y += dy;
+      applyMapTransform();
+      updateMapTiles();
+    });
+    const endDrag = e => {
+      if (drag && drag.id === e.pointerId) drag = null;
+    };
+    mapContainer.addEventListener('pointerup', endDrag);
+    mapContainer.addEventListener('pointercancel', endDrag);
+    window.addEventListener('resize', () => {
+      if (overworldScreen.style.display !== 'none') fitMap();
+    });
+  }
+
+  // Build the map the first time the overworld is shown. Falls back to the
+  // single overworld PNG when the tile pyramid is unavailable.
+  function openMap() {
+    if (mapView) {
+      if (mapView.dzi) fitMap();
+      return;
+    }
+    mapView = { dzi: null, dragged: false };
+    loadDzi(MAP_DZI).then(dzi => {
+      const layer = document.createElement('div');
+      layer.className = 'map-layer';
+      layer.style.width = dzi.width + 'px';
+      layer.style.height = dzi.height + 'px';
+      const overview = new Image();
+      overview.className = 'map-tile loaded';
+      overview.alt = 'World Map';
+      overview.draggable = false;
+      overview.src = tileUrl(dzi, dzi.overviewLevel, 0, 0);
+      overview.style.left = overview.style.top = '0px';
+      overview.style.width = '100%';
+      overview.style.height = '100%';
+      const tileLayer = document.createElement('div');
+      layer.appendChild(overview);
+      layer.appendChild(tileLayer);
+      setupMapRegions(layer);
+      worldMap.appendChild(layer);
+      Object.assign(mapView, { dzi, layer, tileLayer, tiles: new Map(), scale: 0, minScale: 0, x: 0, y: 0 });
+      setupMapInput();
+      fitMap();
+    }).catch(() => {
+      const img = document.createElement('img');
+      img.src = assetUrl(BACKGROUND_DIR + 'overworld.png');
+      img.alt = 'World Map';
+      img.className = 'map-fallback';
+      worldMap.appendChild(img);
+      setupMapRegions(mapContainer);
+    });
+  }
+
   // Attach event handlers
   function setupEventHandlers() {
     document.getElementById('go-to-overworld').onclick = () => {
@@ -432,14 +785,32 @@
     });
   }
 
+  // The service worker from build_service_worker.py only exists in a built
+  // store (see build_store.py), where every asset name is content-hashed
+  function registerServiceWorker() {
+    if (!ASSET_MANIFEST || !('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.register('sw.js')
+      .then(() => precacheBiome(currentBiome))
+      .catch(() => {});
+  }
+
+  // Ask the service worker to keep the current biome's sprites offline
+  function precacheBiome(biomeKey) {
+    if (!biomeKey || !ASSET_MANIFEST || !('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.ready.then(reg => {
+      if (reg.active) reg.active.postMessage({ type: 'biome', biome: biomeKey });
+    });
+  }
+
   // Initialise game on load
   function init() {
     loadData();
     calculateOfflineEncounters();
     buildRanchSummary();
-    setupMapRegions();
+    setBackground(ranchScreen, 'ranch.png');
     setupEventHandlers();
     showScreen(ranchScreen);
+    registerServiceWorker();
   }
 
   init();
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Pack the generated creature sprites into texture atlases.
+
+Every sprite produced by ``generate_creatures.py`` sits on a 100x100 canvas
+that is mostly transparent. This script trims each frame (base and unique, plus
+the radiant and silhouette variants from ``bake_variants.py``) down to its
+opaque bounding box, packs the trimmed frames into one or more atlas pages with
+a MaxRects packer and writes a JSON frame map next to them:
+
+``assets/creatures/atlas_<n>.png`` – atlas pages
+``assets/creatures/atlas.json``    – frame map consumed by ``main.js``
+
+Each frame entry records the page index, the rectangle inside that page and
+the offset of the trimmed rectangle within the original canvas, so a frame can
+be drawn back at its original position with a single ``drawImage`` call.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+from PIL import Image
+
+from generate_creatures import ASSETS_DIR, BASE_OUTPUT, UNIQUE_OUTPUT, encode_sprite_png, write_if_changed
+from bake_variants import RADIANT_OUTPUT, SILHOUETTE_OUTPUT
+
+ATLAS_JSON = os.path.join(ASSETS_DIR, "atlas.json")
+
+
+class MaxRectsBin:
+    """Single atlas page packed with the MaxRects best-short-side-fit heuristic."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+        self.used_width = 0
+        self.used_height = 0
+
+    def insert(self, w, h):
+        """Place a ``w`` x ``h`` rectangle and return its ``(x, y)``, or None if full."""
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is None:
+            return None
+        self._split(best[0], best[1], w, h)
+        self.used_width = max(self.used_width, best[0] + w)
+        self.used_height = max(self.used_height, best[1] + h)
+        return best
+
+    def _split(self, x, y, w, h):
+        remaining = []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                remaining.append((fx, fy, fw, fh))
+                continue
+            # Replace the intersected free rectangle by up to four maximal ones
+            if x > fx:
+                remaining.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                remaining.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                remaining.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                remaining.append((fx, y + h, fw, fy + fh - y - h))
+        self.free = [r for i, r in enumerate(remaining)
+                     if not any(i != j and _contains(o, r) and (o != r or j < i)
+                                for j, o in enumerate(remaining))]
+
+
+def _contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def load_frames():
+    """Load and trim every base, unique, radiant and silhouette sprite.
+
+    Returns a list of ``(key, trimmed_image, offset_x, offset_y, source_w, source_h)``.
+    """
+    frames = []
+    for folder in (BASE_OUTPUT, UNIQUE_OUTPUT, RADIANT_OUTPUT, SILHOUETTE_OUTPUT):
+        for path in sorted(glob.glob(os.path.join(folder, "*.png"))):
+            key = os.path.splitext(os.path.basename(path))[0]
+            with Image.open(path) as src:
+                img = src.convert("RGBA")
+            bbox = img.getchannel("A").getbbox() or (0, 0, 1, 1)
+            frames.append((key, img.crop(bbox), bbox[0], bbox[1], img.width, img.height))
+    return frames
+
+
+def pack_frames(frames, size, padding):
+    """Pack ``frames`` into ``size`` x ``size`` pages, opening new pages as needed.
+
+    Returns ``(bins, placements)`` where placements maps frame key to
+    ``(page, (x, y))``.
+    """
+    bins = []
+    placements = {}
+    for key, img, *_ in frames:
+        w, h = img.width + padding, img.height + padding
+        if w > size or h > size:
+            raise ValueError(f"frame {key} ({img.width}x{img.height}) exceeds atlas size {size}")
+        for page, atlas_bin in enumerate(bins):
+            pos = atlas_bin.insert(w, h)
+            if pos is not None:
+                break
+        else:
+            bins.append(MaxRectsBin(size, size))
+            page = len(bins) - 1
+            pos = bins[page].insert(w, h)
+        placements[key] = (page, pos)
+    return bins, placements
+
+
+def pack_atlas(max_size=2048, padding=1):
+    """Trim, pack and write atlas pages plus the JSON frame map.
+
+    Frames are packed largest first. The page edge starts at the square root
+    of the total frame area and grows until everything fits on one page; only
+    when that would exceed ``max_size`` are frames spread over several pages.
+    Pages are cropped to their used extent before saving.
+    """
+    frames = load_frames()
+    frames.sort(key=lambda f: (max(f[1].size), f[1].width * f[1].height), reverse=True)
+    area = sum((f[1].width + padding) * (f[1].height + padding) for f in frames)
+    size = max(int(math.ceil(math.sqrt(area))), max(max(f[1].size) + padding for f in frames))
+    while True:
+        bins, placements = pack_frames(frames, min(size, max_size), padding)
+        if len(bins) == 1 or size >= max_size:
+            break
+        size = int(size * 1.05) + 1
+
+    pages = [Image.new("RGBA", (b.used_width, b.used_height), (0, 0, 0, 0)) for b in bins]
+    frame_map = {}
+    for key, img, off_x, off_y, src_w, src_h in sorted(frames, key=lambda f: f[0]):
+        page, (x, y) = placements[key]
+        pages[page].paste(img, (x, y))
+        frame_map[key] = {
+            'page': page, 'x': x, 'y': y, 'w': img.width, 'h': img.height,
+            'offsetX': off_x, 'offsetY': off_y, 'sourceW': src_w, 'sourceH': src_h,
+        }
+
+    page_names = []
+    for i, page_img in enumerate(pages):
+        name = f"atlas_{i}.png"
+        write_if_changed(os.path.join(ASSETS_DIR, name), encode_sprite_png(page_img))
+        page_names.append(name)
+    # Drop pages left over from an earlier run that needed more of them
+    for stale in glob.glob(os.path.join(ASSETS_DIR, "atlas_*.png")):
+        if os.path.basename(stale) not in page_names:
+            os.remove(stale)
+    with open(ATLAS_JSON, "w", encoding="utf-8") as fh:
+        json.dump({'pages': page_names, 'frames': frame_map}, fh, indent=1, sort_keys=True)
+        fh.write("\n")
+
+    packed = sum(f[1].width * f[1].height for f in frames)
+    total = sum(p.width * p.height for p in pages)
+    print(f"Packed {len(frames)} frames into {len(pages)} page(s) "
+          f"({', '.join(f'{p.width}x{p.height}' for p in pages)}), "
+          f"{100.0 * packed / total:.1f}% occupancy")
+    return frame_map
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pack creature sprites into atlas pages.")
+    parser.add_argument('--max-size', type=int, default=2048, help="maximum atlas page edge in pixels")
+    parser.add_argument('--padding', type=int, default=1, help="transparent gap between frames")
+    args = parser.parse_args()
+    pack_atlas(max_size=args.max_size, padding=args.padding)
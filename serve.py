@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Static file server for the game, built on asyncio.
+
+A replacement for ``python -m http.server`` in kiosk deployments:
+
+* serves ``.br``/``.gz`` siblings built ahead of time (``--precompress``)
+  when the client accepts them and they are not older than the original,
+  with ``Vary: Accept-Encoding``;
+* sends strong ``ETag``s (SHA-256 of the representation, computed once per
+  file version) and answers ``If-None-Match`` with ``304``;
+* marks content-hashed files from ``build_store.py`` (``static/<hash>.<ext>``)
+  ``immutable`` with a one-year lifetime, everything else ``no-cache``;
+* supports single byte ranges (``206``/``416``, ``If-Range``) on the identity
+  encoding;
+* hands files of ``SENDFILE_THRESHOLD`` bytes or more (the background PNGs,
+  tile pages) to ``loop.sendfile`` so the kernel copies them without passing
+  through Python buffers.
+
+HTTP/1.1 keep-alive is supported; only ``GET`` and ``HEAD`` are accepted, and
+any other method gets ``405`` and a closed connection.
+
+``--load-test`` starts the server in a child process and drives it from
+concurrent keep-alive connections for a few seconds, then reports requests per
+second and latency percentiles.
+"""
+
+import argparse
+import asyncio
+import email.utils
+import gzip
+import hashlib
+import mimetypes
+import multiprocessing
+import os
+import re
+import socket
+import time
+import urllib.parse
+
+from build_store import BASE_DIR, STORE_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SENDFILE_THRESHOLD = 64 * 1024
+CHUNK_SIZE = 64 * 1024
+HASHED_NAME = re.compile(r"(^|/)static/[0-9a-f]{16}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Worth compressing ahead of time; images are already compressed
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".dzi", ".svg", ".xml", ".txt"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+MAX_HEADER_BYTES = 16 * 1024
+
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("application/xml", ".dzi")
+mimetypes.add_type("text/javascript", ".js")
+
+
+class FileInfo:
+    """Validators for one file version, cached by ``(path, mtime, size)``."""
+
+    __slots__ = ('size', 'mtime', 'etag', 'last_modified')
+
+    def __init__(self, path, st):
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+        self.size = st.st_size
+        self.mtime = st.st_mtime_ns
+        self.etag = f'"{digest.hexdigest()[:32]}"'
+        self.last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+
+
+_file_info = {}
+
+
+def file_info(path):
+    st = os.stat(path)
+    info = _file_info.get(path)
+    if info is None or info.mtime != st.st_mtime_ns or info.size != st.st_size:
+        info = _file_info[path] = FileInfo(path, st)
+    return info
+
+
+def resolve_path(root, url_path):
+    """Map a request path to a file under ``root``, or None."""
+    path = urllib.parse.unquote(url_path.split("?", 1)[0])
+    full = os.path.realpath(os.path.join(root, path.lstrip("/")))
+    if full != root and not full.startswith(root + os.sep):
+        return None
+    if os.path.isdir(full):
+        full = os.path.join(full, "index.html")
+    return full if os.path.isfile(full) else None
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single ``bytes=`` range, None if absent or
+    unsupported, or ``False`` if it cannot be satisfied."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def choose_encoding(path, accept_encoding):
+    """Pick the best precompressed sibling the client accepts.
+
+    A sibling older than the file it was built from is stale (the file was
+    edited after ``--precompress``) and is ignored.
+    """
+    accepted = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+    original = None
+    for encoding, suffix in ENCODINGS:
+        if encoding not in accepted:
+            continue
+        try:
+            sibling = os.stat(path + suffix)
+        except OSError:
+            continue
+        if original is None:
+            original = os.stat(path).st_mtime_ns
+        if sibling.st_mtime_ns >= original:
+            return encoding, path + suffix
+    return None, path
+
+
+async def read_request(reader):
+    """Return ``(method, target, version, headers)`` or None at end of stream."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+def response_head(status, reason, headers):
+    lines = [f"HTTP/1.1 {status} {reason}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_body(writer, path, start, length):
+    with open(path, "rb") as fh:
+        if length >= SENDFILE_THRESHOLD:
+            await writer.drain()
+            await asyncio.get_running_loop().sendfile(writer.transport, fh, start, length)
+            return
+        fh.seek(start)
+        remaining = length
+        while remaining:
+            block = fh.read(min(CHUNK_SIZE, remaining))
+            if not block:
+                break
+            writer.write(block)
+            remaining -= len(block)
+            await writer.drain()
+
+
+async def handle_request(root, method, target, headers, writer):
+    """Write one response; returns False if the connection must close."""
+    base = {'Server': 'shiny-static', 'Date': email.utils.formatdate(usegmt=True)}
+    if method not in ("GET", "HEAD"):
+        # Request bodies are never read, so a body left in the stream would
+        # be parsed as the next request; close the connection instead
+        writer.write(response_head(405, "Method Not Allowed", dict(
+            base, Allow="GET, HEAD", Connection="close", **{'Content-Length': '0'})))
+        return False
+    path = resolve_path(root, target)
+    if path is None:
+        body = b"Not Found\n"
+        writer.write(response_head(404, "Not Found", dict(base, **{
+            'Content-Type': 'text/plain', 'Content-Length': str(len(body))})))
+        if method == "GET":
+            writer.write(body)
+        return True
+
+    range_header = headers.get("range")
+    # Ranges are served from the identity representation only
+    if range_header:
+        encoding, source = None, path
+    else:
+        encoding, source = choose_encoding(path, headers.get("accept-encoding", ""))
+    info = file_info(source)
+    rel = os.path.relpath(path, root).replace(os.sep, "/")
+    out = dict(base)
+    out['Content-Type'] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    out['ETag'] = info.etag
+    out['Last-Modified'] = info.last_modified
+    out['Cache-Control'] = IMMUTABLE if HASHED_NAME.search(rel) else REVALIDATE
+    out['Accept-Ranges'] = "bytes"
+    if os.path.splitext(path)[1] in COMPRESSIBLE:
+        out['Vary'] = "Accept-Encoding"
+    if encoding:
+        out['Content-Encoding'] = encoding
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*"
+                          or info.etag in [t.strip() for t in if_none_match.split(",")]):
+        writer.write(response_head(304, "Not Modified", {k: v for k, v in out.items()
+                                                         if k != 'Content-Type'}))
+        return True
+
+    start, length, status, reason = 0, info.size, 200, "OK"
+    if range_header and headers.get("if-range", info.etag) == info.etag:
+        byte_range = parse_range(range_header, info.size)
+        if byte_range is False:
+            out['Content-Range'] = f"bytes */{info.size}"
+            out['Content-Length'] = "0"
+            writer.write(response_head(416, "Range Not Satisfiable", out))
+            return True
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            status, reason = 206, "Partial Content"
+            out['Content-Range'] = f"bytes {start}-{end}/{info.size}"
+    out['Content-Length'] = str(length)
+    writer.write(response_head(status, reason, out))
+    if method == "GET" and length:
+        await send_body(writer, source, start, length)
+    return True
+
+
+async def handle_connection(root, reader, writer):
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+            method, target, version, headers = request
+            keep_alive = (headers.get("connection", "").lower() != "close"
+                          and version == "HTTP/1.1")
+            keep_open = await handle_request(root, method, target, headers, writer)
+            await writer.drain()
+            if not (keep_alive and keep_open):
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(root, host="127.0.0.1", port=8000, ready=None):
+    root = os.path.realpath(root)
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(root, r, w), host, port, limit=MAX_HEADER_BYTES)
+    if ready is not None:
+        ready.set()
+    else:
+        print(f"Serving {root} on http://{host}:{port}/")
+    async with server:
+        await server.serve_forever()
+
+
+def precompress(root):
+    """Write ``.gz`` (and ``.br`` if available) siblings for compressible files."""
+    written = 0
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1] not in COMPRESSIBLE:
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as fh:
+                data = fh.read()
+            variants = [(".gz", gzip.compress(data, 9, mtime=0))]
+            if brotli:
+                variants.append((".br", brotli.compress(data, quality=11)))
+            for suffix, packed in variants:
+                if len(packed) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as fh:
+                    fh.write(packed)
+                written += 1
+    print(f"Wrote {written} precompressed files under {root}"
+          + ("" if brotli else " (brotli not installed, gzip only)"))
+
+
+def _run_server(root, port, ready):
+    asyncio.run(serve(root, port=port, ready=ready))
+
+
+async def _client(port, paths, deadline, latencies, headers):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode("latin-1"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(re.search(rb"(?i)content-length: (\d+)", head).group(1))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def _drive(port, paths, connections, duration, headers):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, paths, deadline, latencies, headers)
+                           for _ in range(connections)))
+    return latencies, time.perf_counter() - started
+
+
+def load_test(root, paths, connections=32, duration=5.0, accept_encoding="br, gzip"):
+    """Run the server in a child process and report throughput and latency."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=_run_server, args=(root, port, ready), daemon=True)
+    server.start()
+    try:
+        if not ready.wait(10):
+            raise SystemExit("server did not start")
+        headers = f"Accept-Encoding: {accept_encoding}\r\n" if accept_encoding else ""
+        latencies, elapsed = asyncio.run(_drive(port, paths, connections, duration, headers))
+    finally:
+        server.terminate()
+        server.join()
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    print(f"{len(latencies)} requests over {connections} connections in {elapsed:.2f}s: "
+          f"{len(latencies) / elapsed:.0f} req/s, p50 {pct(0.5):.2f} ms, "
+          f"p99 {pct(0.99):.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    return latencies
+
+
+def default_paths(root):
+    """A request mix for the load test: the page, its script and stylesheet and
+    a few images."""
+    paths = ["/"]
+    for dirpath, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.endswith((".js", ".css", ".png", ".webp", ".jpg")) and len(paths) < 16:
+                paths.append("/" + os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"))
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the game's static files.")
+    parser.add_argument('root', nargs='?',
+                        default=STORE_DIR if os.path.isdir(STORE_DIR) else BASE_DIR,
+                        help="directory to serve (default: dist if built, else the repo)")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', '-p', type=int, default=8000)
+    parser.add_argument('--precompress', action='store_true',
+                        help="write .br/.gz siblings for text assets and exit")
+    parser.add_argument('--load-test', action='store_true',
+                        help="benchmark the server against a local client and exit")
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--path', action='append', help="load-test request path (repeatable)")
+    args = parser.parse_args()
+    if args.precompress:
+        precompress(args.root)
+    elif args.load_test:
+        load_test(args.root, args.path or default_paths(args.root), args.connections, args.duration)
+    else:
+        try:
+            asyncio.run(serve(args.root, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
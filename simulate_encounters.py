@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo simulation of the encounter and catch loop.
+
+The rules are read from ``main.js`` itself (see ``load_rules``): the day and
+night pools of every biome in ``BIOMES``, the ``CATCH_RATES`` table applied
+by roster index, and the roll thresholds of ``generateEncounterResult``
+(one ``1..5000`` roll, ``5000`` is unique, ``4500`` and up radiant). Per
+encounter a creature is picked uniformly from the pool and the variant
+rolled; ``processQueue`` counts an already caught variant as a duplicate,
+anything else opens the encounter screen where ``attemptCatch`` succeeds
+with the creature's catch rate. An escaped variant stays uncaught, so the
+next encounter of it is another attempt.
+
+A player hunts each pool until a codex tier (every creature of the pool
+caught in that variant) is complete; the codex total for a tier is the sum
+over all ten pools. Two engines produce per-player completion times:
+
+``skip``    – the default. Only catches of a new variant change the state,
+              so the engine draws the number of encounters up to the next
+              one (geometric, with the summed odds of every variant still
+              missing) and then which variant it was. A pool takes at most
+              fifteen vector steps per batch of players however many
+              encounters the hunt lasts; the encounter counts have exactly
+              the distribution of playing every encounter.
+``direct``  – plays every encounter as ``main.js`` does, in ``[players,
+              encounters]`` blocks of creature picks, rolls and catch
+              draws. It is the literal port that ``--check`` validates the
+              skip engine against; the unique tier takes hundreds of
+              thousands of encounters per pool, so pass ``--tiers`` to keep
+              it to the cheap ones.
+
+Players are simulated in fixed-size batches, each seeded from its own child
+of ``numpy.random.SeedSequence(seed)``, so results do not depend on
+``--jobs``. Batches run in a process pool; workers return per-player codex
+totals and per-pool sums only.
+
+Runs report players per second. Encounters per second are only reported for
+the direct engine, which actually plays them; the skip engine's encounter
+count is the sum of the gaps it jumps over and says nothing about speed.
+Measure encounter throughput with ``--engine direct --jobs N``.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent import futures
+
+import numpy as np
+
+from analyze_budget import parse_main_js
+from build_store import BASE_DIR
+
+MAIN_JS = os.path.join(BASE_DIR, "main.js")
+VARIANTS = ('standard', 'radiant', 'unique')
+BATCH_PLAYERS = 1 << 14
+DIRECT_BLOCK = 1 << 22
+QUANTILES = (0.1, 0.5, 0.9, 0.99)
+
+Pool = namedtuple('Pool', 'biome phase ids catch_rates')
+
+
+def load_rules(path=MAIN_JS):
+    """Read the encounter pools, catch rates and variant rolls from ``main.js``.
+
+    Returns ``{'pools': [Pool, ...], 'roll_sides': 5000, 'unique_roll': 5000,
+    'radiant_roll': 4500}``; catch rates are percentages.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        source = fh.read()
+    parsed = parse_main_js(source)
+    table = re.search(r"const CATCH_RATES = \[([\d,\s]+)\];", source)
+    body = source[source.index("function generateEncounterResult()"):]
+    body = body[:body.index("\n  }\n")]
+    sides = re.search(r"Math\.floor\(Math\.random\(\) \* (\d+)\) \+ 1", body)
+    unique = re.search(r"roll === (\d+)", body)
+    radiant = re.search(r"roll >= (\d+)", body)
+    if not (table and sides and unique and radiant):
+        raise ValueError(f"could not find the encounter rules in {path}")
+    rates = [int(v) for v in table.group(1).split(",")]
+    rate_of = {cid: rates[i % len(rates)] for i, cid in enumerate(parsed['ids'])}
+    pools = [Pool(biome, phase, tuple(entry[phase]), tuple(rate_of[cid] for cid in entry[phase]))
+             for biome, entry in parsed['biomes'].items() for phase in ('day', 'night')]
+    return {'pools': pools, 'roll_sides': int(sides.group(1)),
+            'unique_roll': int(unique.group(1)), 'radiant_roll': int(radiant.group(1))}
+
+
+def variant_odds(rules):
+    """Return the per-encounter odds of ``VARIANTS`` for a ``1..roll_sides`` roll."""
+    sides, unique_roll, radiant_roll = rules['roll_sides'], rules['unique_roll'], rules['radiant_roll']
+    unique = 1 if 1 <= unique_roll <= sides else 0
+    radiant = sum(1 for roll in range(max(1, radiant_roll), sides + 1) if roll != unique_roll)
+    return np.array([sides - radiant - unique, radiant, unique]) / sides
+
+
+def key_rates(pool, rules):
+    """Per-encounter odds of catching each ``(creature, variant)`` while it is missing.
+
+    Returns a ``[creatures, 3]`` array: the pool pick, the variant roll and the
+    catch rate, as one encounter has to get all three.
+    """
+    catch = np.array(pool.catch_rates) / 100.0
+    return catch[:, None] * variant_odds(rules)[None, :] / len(pool.ids)
+
+
+def simulate_pool_skip(rates, players, rng):
+    """Return ``[players, 3]`` encounters until each variant tier of a pool is complete."""
+    flat = rates.ravel()
+    rows = np.arange(players)
+    remaining = np.ones((players, flat.size), bool)
+    caught_at = np.empty((players, flat.size), np.int64)
+    clock = np.zeros(players, np.int64)
+    for _ in range(flat.size):
+        cum = np.cumsum(remaining * flat, axis=1)
+        total = cum[:, -1]
+        clock += rng.geometric(total)
+        # 1 - random() lies in (0, 1], so a caught key (zero width) is never picked
+        target = (1.0 - rng.random(players)) * total
+        pick = (cum < target[:, None]).sum(axis=1)
+        caught_at[rows, pick] = clock
+        remaining[rows, pick] = False
+    return caught_at.reshape(players, *rates.shape).max(axis=1)
+
+
+def simulate_pool_direct(pool, rules, players, rng, tiers=VARIANTS, block=DIRECT_BLOCK):
+    """Play every encounter of a pool; returns ``[players, 3]`` tier completion times.
+
+    Tiers not in ``tiers`` are left at -1. Returns ``(times, encounters_played)``.
+    """
+    size = len(pool.ids)
+    catch = np.array(pool.catch_rates, dtype=np.int8)
+    wanted = [VARIANTS.index(tier) for tier in tiers]
+    keys = [j * 3 + v for j in range(size) for v in wanted]
+    caught_at = np.full((players, size * 3), -1, np.int64)
+    active = np.arange(players)
+    played = 0
+    offset = 0
+    while active.size:
+        length = max(64, block // active.size)
+        shape = (active.size, length)
+        # const creatureId = pool[Math.floor(Math.random() * pool.length)]
+        creature = rng.integers(0, size, shape, dtype=np.int8)
+        # const roll = Math.floor(Math.random() * 5000) + 1
+        roll = rng.integers(1, rules['roll_sides'] + 1, shape, dtype=np.int16)
+        variant = np.where(roll == rules['unique_roll'], 2,
+                           (roll >= rules['radiant_roll']).view(np.int8)).astype(np.int8)
+        # attemptCatch: Math.random() * 100 < info.catchRate; catch rates are
+        # whole percentages, so a uniform 0..99 draw has the same odds
+        success = rng.integers(0, 100, shape, dtype=np.int8) < catch[creature]
+        code = np.where(success, creature * 3 + variant, -1).astype(np.int8)
+        local = caught_at[active]
+        for key in keys:
+            missing = local[:, key] < 0
+            if not missing.any():
+                continue
+            hit = (code if missing.all() else code[missing]) == key
+            first = hit.argmax(axis=1)
+            got = hit[np.arange(first.size), first]
+            rows = np.flatnonzero(missing)[got]
+            local[rows, key] = offset + first[got] + 1
+        caught_at[active] = local
+        done = (local[:, keys] >= 0).all(axis=1)
+        # players stop once their tiers are complete, so count only those encounters
+        finish = np.where(done, local[:, keys].max(axis=1) - offset, length)
+        played += int(finish.sum())
+        active = active[~done]
+        offset += length
+    times = caught_at.reshape(players, size, 3).max(axis=1)
+    times[:, [v for v in range(3) if v not in wanted]] = -1
+    return times, played
+
+
+def simulate_batch(rules, seed_seq, players, engine='skip', tiers=VARIANTS):
+    """Simulate ``players`` hunts of every pool.
+
+    Returns ``{'totals': [players, 3] codex totals, 'pool_sums': [pools, 3],
+    'pool_sumsq': [pools, 3], 'encounters': n}`` where ``encounters`` counts
+    the encounters up to the last tier finished in each pool: played ones for
+    the direct engine, skipped over for the skip engine.
+    """
+    rng = np.random.default_rng(seed_seq)
+    pools = rules['pools']
+    totals = np.zeros((players, 3), np.int64)
+    pool_sums = np.zeros((len(pools), 3))
+    pool_sumsq = np.zeros((len(pools), 3))
+    encounters = 0
+    for index, pool in enumerate(pools):
+        if engine == 'skip':
+            times = simulate_pool_skip(key_rates(pool, rules), players, rng)
+            encounters += int(times.max(axis=1).sum())
+        else:
+            times, played = simulate_pool_direct(pool, rules, players, rng, tiers)
+            encounters += played
+        totals += times
+        pool_sums[index] = times.sum(axis=0)
+        pool_sumsq[index] = (times.astype(np.float64) ** 2).sum(axis=0)
+    return {'totals': totals, 'pool_sums': pool_sums, 'pool_sumsq': pool_sumsq,
+            'encounters': encounters}
+
+
+def simulate(players, seed=0, jobs=1, engine='skip', tiers=VARIANTS, rules=None,
+             batch=BATCH_PLAYERS):
+    """Run ``players`` hunts in seeded batches, across ``jobs`` processes.
+
+    Returns a summary dict: per-tier codex totals (mean, std and
+    ``QUANTILES``), per-pool tier means, encounters and players per second.
+    Only the direct engine plays its encounters, so ``encounters_per_s`` is
+    only reported for it.
+    """
+    rules = rules or load_rules()
+    started = time.perf_counter()
+    sizes = [min(batch, players - start) for start in range(0, players, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([rules] * len(sizes), seeds, sizes, [engine] * len(sizes), [tiers] * len(sizes))
+    if jobs > 1 and len(sizes) > 1:
+        with futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(simulate_batch, *args))
+    else:
+        results = list(map(simulate_batch, *args))
+    elapsed = time.perf_counter() - started
+    totals = np.concatenate([r['totals'] for r in results])
+    pool_means = sum(r['pool_sums'] for r in results) / players
+    encounters = sum(r['encounters'] for r in results)
+    summary = {'players': players, 'engine': engine, 'jobs': jobs, 'seed': seed,
+               'seconds': elapsed, 'encounters': encounters, 'players_per_s': players / elapsed,
+               'codex': {}, 'pools': {}}
+    if engine == 'direct':
+        summary['encounters_per_s'] = encounters / elapsed
+    for tier in tiers:
+        v = VARIANTS.index(tier)
+        column = totals[:, v]
+        summary['codex'][tier] = dict(
+            mean=float(column.mean()), std=float(column.std()),
+            **{f"p{round(q * 100)}": float(np.quantile(column, q)) for q in QUANTILES})
+        for pool, mean in zip(rules['pools'], pool_means[:, v]):
+            summary['pools'].setdefault(f"{pool.biome}_{pool.phase}", {})[tier] = float(mean)
+    return summary
+
+
+def print_summary(summary):
+    names = [f"p{round(q * 100)}" for q in QUANTILES]
+    print(f"{'tier':<9} {'mean':>12} {'std':>12} " + " ".join(f"{n:>12}" for n in names))
+    for tier, stats in summary['codex'].items():
+        print(f"{tier:<9} {stats['mean']:>12.1f} {stats['std']:>12.1f} "
+              + " ".join(f"{stats[n]:>12.0f}" for n in names))
+    tiers = list(summary['codex'])
+    print(f"\n{'pool':<15} " + " ".join(f"{tier:>12}" for tier in tiers))
+    for pool, means in summary['pools'].items():
+        print(f"{pool:<15} " + " ".join(f"{means[tier]:>12.1f}" for tier in tiers))
+    rate = f"{summary['players_per_s']:.0f} players/s"
+    if 'encounters_per_s' in summary:
+        played = f"{summary['encounters']} encounters played"
+        rate = f"{summary['encounters_per_s'] / 1e6:.1f}M encounters/s, " + rate
+    else:
+        # the skip engine jumps over these rather than playing them
+        played = f"{summary['encounters']} encounters simulated"
+    print(f"\n{summary['players']} players, {played} in {summary['seconds']:.2f}s "
+          f"({rate}, {summary['engine']} engine, {summary['jobs']} job(s))")
+
+
+def check_engines(players=4000, seed=0, tiers=('standard', 'radiant'), sigmas=4.0):
+    """Compare the skip engine with the direct one on every pool mean.
+
+    Returns the list of ``(pool, tier, skip_mean, direct_mean)`` that differ by
+    more than ``sigmas`` standard errors.
+    """
+    rules = load_rules()
+    skip = simulate_batch(rules, np.random.SeedSequence(seed), players, 'skip')
+    direct = simulate_batch(rules, np.random.SeedSequence(seed + 1), players, 'direct', tiers)
+    failures = []
+    for index, pool in enumerate(rules['pools']):
+        for tier in tiers:
+            v = VARIANTS.index(tier)
+            means = [r['pool_sums'][index, v] / players for r in (skip, direct)]
+            variances = [r['pool_sumsq'][index, v] / players - mean ** 2
+                         for r, mean in zip((skip, direct), means)]
+            error = np.sqrt(sum(variances) / players)
+            status = "ok" if abs(means[0] - means[1]) <= sigmas * error else "FAIL"
+            print(f"{pool.biome + '_' + pool.phase:<15} {tier:<9} skip {means[0]:9.2f} "
+                  f"direct {means[1]:9.2f} {status}")
+            if status != "ok":
+                failures.append((f"{pool.biome}_{pool.phase}", tier, means[0], means[1]))
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate codex completion times.")
+    parser.add_argument('--players', '-n', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="worker processes (0 = one per CPU)")
+    parser.add_argument('--engine', choices=('skip', 'direct'), default='skip')
+    parser.add_argument('--tiers', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--json', metavar='FILE', help="also write the summary to FILE")
+    parser.add_argument('--check', action='store_true',
+                        help="check the skip engine against the direct port of main.js")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(1 if check_engines(seed=args.seed) else 0)
+    result = simulate(args.players, args.seed, args.jobs or os.cpu_count() or 1,
+                      args.engine, tuple(args.tiers))
+    print_summary(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=1)
+            fh.write("\n")